@@ -0,0 +1,201 @@
+"""
+Forecast benchmark over the Data splits of the CSV input (BGL, Secrepo,
+Brute Force), replayed in fast-forward: every forecaster predicts the
+next timestamp from the history up to a point, for evenly spaced points
+of every split.
+
+Reports per dataset, window configuration and forecaster: fit time per
+forecast and per point the forecaster used, p99 fit latency, peak memory of a fit and
+the error of the predicted interval. Results are printed as a table and
+written as JSON for regression tracking.
+
+Usage: python -m ads.benchmark [--datasets bgl secrepo brute] [--splits test]
+       [--forecasters triple_es holt] [--windows 100 500] [--output bench.json]
+"""
+
+import os
+import json
+import time
+import argparse
+import platform
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+from dataclasses import replace
+
+from ads.input.csv.data import Data
+from ads.detect_algs.forecasters import FORECASTERS
+from ads.detect_algs.triple_es.algorithm import CustomParameters
+
+# File prefixes of the datasets in the Data root
+DATASETS = {
+    "bgl": "bgl",
+    "secrepo": "secrepo_access",
+    "brute": "brute_forse",
+}
+SPLITS = ("train", "val", "test")
+# Fits traced for the peak memory of a run
+MEMORY_SAMPLES = 5
+
+
+def load_split(dataset: str, split: str) -> np.ndarray:
+    """Returns the sorted epoch timestamps of the split, empty if it is missing."""
+    data = Data()
+    path = f"{data.root}{DATASETS[dataset]}_{split}_data.pkl"
+    if not os.path.exists(path):
+        return np.empty(0)
+    return np.sort(data.get_epoch(pd.read_pickle(path)).astype(np.float64))
+
+
+def replay(
+    timestamps: np.ndarray,
+    forecaster: str,
+    config: CustomParameters,
+    forecasts: int,
+    warmup: int,
+) -> dict:
+    """Forecasts the timestamp after `forecasts` evenly spaced points."""
+    points = np.unique(np.linspace(warmup, len(timestamps) - 2, forecasts).astype(int))
+    func = FORECASTERS[forecaster].func
+    window = FORECASTERS[forecaster].window
+    seconds, errors, windows = [], [], []
+    failed = 0
+    for i in points:
+        data = timestamps[: i + 1]
+        start = time.perf_counter()
+        try:
+            prediction = func(data, config)
+        except Exception:
+            prediction = np.nan
+        seconds.append(time.perf_counter() - start)
+
+        if not np.isfinite(prediction):
+            failed += 1
+            continue
+        # The error of the predicted interval is the error of the timestamp
+        errors.append(abs(prediction - timestamps[i + 1]))
+        windows.append(len(window(data, config)))
+
+    # Tracing slows the fits down, memory is measured on a few of them apart
+    peak = 0
+    for i in points[:: max(1, len(points) // MEMORY_SAMPLES)]:
+        tracemalloc.start()
+        try:
+            func(timestamps[: i + 1], config)
+        except Exception:
+            pass
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    seconds = np.array(seconds)
+    errors = np.array(errors) if errors else np.array([np.nan])
+    intervals = np.diff(timestamps[points[0] :])
+    return {
+        "forecasts": len(points),
+        "failed": failed,
+        "mean_window": float(np.mean(windows)) if windows else 0.0,
+        "fit_seconds_mean": float(seconds.mean()),
+        "fit_seconds_p50": float(np.quantile(seconds, 0.5)),
+        "fit_seconds_p99": float(np.quantile(seconds, 0.99)),
+        "fit_us_per_point": (
+            float(seconds.mean() / np.mean(windows) * 1e6) if windows else 0.0
+        ),
+        "peak_memory_bytes": int(peak),
+        "interval_mae": float(np.mean(errors)),
+        "interval_median_ae": float(np.median(errors)),
+        "interval_p95_ae": float(np.quantile(errors, 0.95)),
+        "mean_interval": float(np.mean(intervals)) if len(intervals) else 0.0,
+    }
+
+
+def run(args: argparse.Namespace) -> list[dict]:
+    results = []
+    for dataset in args.datasets:
+        for split in args.splits:
+            timestamps = load_split(dataset, split)
+            if len(timestamps) < args.warmup + 2:
+                print(f"Skipping {dataset}/{split}: missing or too short")
+                continue
+            for window in args.windows:
+                config = replace(
+                    CustomParameters(),
+                    window_points=window,
+                    window_horizon=args.horizon,
+                    burst_interval=args.burst_interval,
+                )
+                for forecaster in args.forecasters:
+                    result = replay(
+                        timestamps, forecaster, config, args.forecasts, args.warmup
+                    )
+                    result.update(
+                        dataset=dataset,
+                        split=split,
+                        points=len(timestamps),
+                        window_points=window,
+                        window_horizon=args.horizon,
+                        burst_interval=args.burst_interval,
+                        forecaster=forecaster,
+                    )
+                    results.append(result)
+                    print(
+                        f"{dataset:>8}/{split:<5} window={window:<5} "
+                        f"{forecaster:<16} "
+                        f"fit {result['fit_seconds_mean'] * 1000:8.2f} ms "
+                        f"p99 {result['fit_seconds_p99'] * 1000:8.2f} ms "
+                        f"{result['fit_us_per_point']:7.2f} us/point "
+                        f"mem {result['peak_memory_bytes'] / 1024:8.1f} KiB "
+                        f"MAE {result['interval_mae']:10.2f} s "
+                        f"(mean interval {result['mean_interval']:.2f} s)"
+                    )
+    return results
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--datasets", nargs="+", choices=list(DATASETS), default=list(DATASETS)
+    )
+    parser.add_argument("--splits", nargs="+", choices=SPLITS, default=["test"])
+    parser.add_argument(
+        "--forecasters",
+        nargs="+",
+        choices=list(FORECASTERS),
+        default=list(FORECASTERS),
+    )
+    parser.add_argument(
+        "--windows",
+        nargs="+",
+        type=int,
+        default=[CustomParameters().window_points],
+        help="window_points configurations (0 = no limit)",
+    )
+    parser.add_argument("--horizon", type=float, default=None)
+    parser.add_argument("--burst-interval", type=float, default=0.0)
+    parser.add_argument(
+        "--forecasts", type=int, default=200, help="forecasts per dataset split"
+    )
+    parser.add_argument(
+        "--warmup", type=int, default=50, help="history before the first forecast"
+    )
+    parser.add_argument("--output", default="bench_results.json")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    results = run(args)
+    report = {
+        "created": time.time(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "args": vars(args),
+        "results": results,
+    }
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"Results of {len(results)} run/s written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
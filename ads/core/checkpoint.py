@@ -0,0 +1,172 @@
+"""
+Snapshots of the Core state for fast restarts: the fitted model of every
+source and the newest timestamps already applied to it and already sent
+to the workers. High-water marks are stored as timestamps, not counts,
+so they stay valid after the input manager reloads the history, with
+their rank among the equal timestamps, so duplicates do not move them.
+
+Snapshots are msgpack with NumPy arrays (ads/core/serializer.py), one
+row of float64 values per source, in a local file or a Redis key.
+"""
+
+import os
+import time
+import numpy as np
+
+from typing import Optional
+from loguru import logger
+from redis import Redis
+from redis.exceptions import RedisError
+
+from ads.core.serializer import dumps, loads
+from ads.input.store import TimestampStore
+from ads.detect_algs.triple_es.model import FitStart
+from ads.detect_algs.triple_es.online import HoltState
+
+VERSION = 2
+REDIS_KEY = "ads:checkpoint"
+
+# Columns of a source row, NaN marks a missing value
+STATE_FIELDS = ("alpha", "beta", "level", "trend", "mae", "drift", "age", "window")
+START_FIELDS = ("alpha", "beta", "trend")
+COLUMNS = (
+    [f"state_{name}" for name in STATE_FIELDS]
+    + ["state_mark", "state_mark_rank"]
+    + [f"start_{name}" for name in START_FIELDS]
+    + ["dispatched_mark", "dispatched_mark_rank"]
+)
+STATE_MARK = len(STATE_FIELDS)
+START = STATE_MARK + 2
+DISPATCHED_MARK = START + len(START_FIELDS)
+
+# (fitted state, timestamps applied to it, warm start) of a source
+Model = tuple[Optional[HoltState], Optional[int], Optional[FitStart]]
+
+
+def to_mark(
+    logs: TimestampStore, name: str, total: Optional[int]
+) -> tuple[float, float]:
+    """
+    Returns the timestamp of the `total`-th appended point of the source
+    and its rank (from 1) among the points with the same timestamp.
+    """
+    if total is None or name not in logs:
+        return np.nan, np.nan
+    data = logs[name]
+    index = len(data) - (logs.total(name) - total) - 1
+    if index < 0 or index >= len(data):
+        return np.nan, np.nan
+    mark = data[index]
+    return float(mark), float(index - np.searchsorted(data, mark, side="left") + 1)
+
+
+def to_total(
+    logs: TimestampStore, name: str, mark: float, rank: float
+) -> Optional[int]:
+    """Returns the number of appended points of the source up to the mark."""
+    if np.isnan(mark) or np.isnan(rank) or name not in logs:
+        return None
+    data = logs[name]
+    first = int(np.searchsorted(data, mark, side="left"))
+    stop = int(np.searchsorted(data, mark, side="right"))
+    return logs.total(name) - (len(data) - min(first + int(rank), stop))
+
+
+def encode(
+    models: dict[str, Model], dispatched: dict[str, int], logs: TimestampStore
+) -> bytes:
+    names = sorted(models.keys() | dispatched.keys())
+    rows = np.full((len(names), len(COLUMNS)), np.nan)
+    for i, name in enumerate(names):
+        state, total, start = models.get(name, (None, None, None))
+        if state is not None:
+            rows[i, : len(STATE_FIELDS)] = [getattr(state, f) for f in STATE_FIELDS]
+            rows[i, STATE_MARK : STATE_MARK + 2] = to_mark(logs, name, total)
+        if start is not None:
+            rows[i, START:DISPATCHED_MARK] = [getattr(start, f) for f in START_FIELDS]
+        rows[i, DISPATCHED_MARK:] = to_mark(logs, name, dispatched.get(name))
+    return dumps(
+        {
+            "version": VERSION,
+            "created": time.time(),
+            "columns": COLUMNS,
+            "names": names,
+            "rows": rows.reshape(-1),
+        }
+    )
+
+
+def decode(
+    data: bytes, logs: TimestampStore
+) -> tuple[dict[str, Model], dict[str, int]]:
+    """
+    Returns the models and dispatched totals of the snapshot, with the
+    marks converted to totals of the current `logs`.
+    """
+    snapshot = loads(data)
+    if snapshot.get("version") != VERSION or snapshot["columns"] != COLUMNS:
+        raise ValueError(f"Unsupported checkpoint version {snapshot.get('version')}")
+    rows = np.asarray(snapshot["rows"]).reshape(-1, len(COLUMNS))
+
+    models: dict[str, Model] = {}
+    dispatched: dict[str, int] = {}
+    for name, row in zip(snapshot["names"], rows):
+        state = start = None
+        total = to_total(logs, name, *row[STATE_MARK : STATE_MARK + 2])
+        if total is not None and not np.isnan(row[0]):
+            values = dict(zip(STATE_FIELDS, row[: len(STATE_FIELDS)].tolist()))
+            values["age"] = int(values["age"])
+            values["window"] = int(values["window"])
+            state = HoltState(**values)
+        if not np.isnan(row[START]):
+            start = FitStart(*row[START:DISPATCHED_MARK].tolist())
+        if state is not None or start is not None:
+            models[name] = (state, total, start)
+
+        sent = to_total(logs, name, *row[DISPATCHED_MARK:])
+        if sent is not None:
+            dispatched[name] = sent
+    return models, dispatched
+
+
+class Checkpointer:
+    def __init__(self, target: str, interval: float):
+        """
+        Saves snapshots every `interval` seconds to `target`,
+        a redis:// URL or a file path.
+        """
+        self.target = target
+        self.interval = interval
+        self.__redis: Optional[Redis] = None
+        if target.startswith(("redis://", "rediss://", "unix://")):
+            self.__redis = Redis.from_url(target)
+        self.__saved_at = time.monotonic()
+
+    def due(self) -> bool:
+        return time.monotonic() - self.__saved_at >= self.interval
+
+    def save(self, data: bytes) -> None:
+        self.__saved_at = time.monotonic()
+        try:
+            if self.__redis is not None:
+                self.__redis.set(REDIS_KEY, data)
+                return
+            # Write and rename, a crash never leaves a partial snapshot
+            temp = f"{self.target}.tmp"
+            with open(temp, "wb") as file:
+                file.write(data)
+            os.replace(temp, self.target)
+        except (OSError, RedisError) as e:
+            logger.error(f"Cannot save checkpoint to {self.target}: {e}")
+
+    def load(self) -> Optional[bytes]:
+        try:
+            if self.__redis is not None:
+                return self.__redis.get(REDIS_KEY)
+            with open(self.target, "rb") as file:
+                return file.read()
+        except FileNotFoundError:
+            return None
+        except (OSError, RedisError) as e:
+            logger.error(f"Cannot load checkpoint from {self.target}: {e}")
+            return None
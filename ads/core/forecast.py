@@ -0,0 +1,325 @@
+import time
+import numpy as np
+
+from typing import Optional
+from loguru import logger
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+
+from ads.core.metrics import metrics
+from ads.core.settings import CoreSettings
+from ads.detect_algs.forecasters import FITTED_FORECASTERS, FORECASTERS, forecast
+from ads.detect_algs.triple_es.batch import fit_holt_states
+from ads.detect_algs.triple_es.algorithm import CustomParameters
+from ads.detect_algs.triple_es.model import FitStart, FitTimeout
+from ads.detect_algs.triple_es.online import (
+    ForecastPath,
+    HoltState,
+    OnlineTripleES,
+    fit_holt_state,
+)
+
+
+def predict_chunk(
+    chunk: list[tuple[str, np.ndarray, Optional[FitStart]]],
+    config: CustomParameters = CustomParameters(),
+) -> list[tuple[str, object, float]]:
+    """
+    Fits every source in the chunk, warm started from its previous fit if given.
+    Returns (name, state, seconds), the state is the fitted HoltState of the
+    source or the raised exception if the fit failed or timed out.
+    """
+    results = []
+    for name, data, fit_start in chunk:
+        start = time.perf_counter()
+        try:
+            state = fit_holt_state(data, config, fit_start)
+        except Exception as e:
+            state = e
+        results.append((name, state, time.perf_counter() - start))
+    return results
+
+
+class ForecastPool:
+    def __init__(self, settings: CoreSettings):
+        """
+        Forecasting stage of the Core, fans `predict` out over a pool of
+        processes or threads in chunks of sources and gathers the results
+        until the per-tick deadline. Refits start from the previous fit
+        of the source, a cold fit happens only on its first one.
+        Full fits are limited by the per-tick time budget, the other sources
+        and failed or late fits get a forecast of a cheaper forecaster.
+        Every fit forecasts the next `forecast_steps` arrivals, they are
+        the forecasts of the following ticks while the arrivals are on time.
+        Chunks still running at the deadline cannot be cancelled, their fits
+        are collected on a later tick and kept as warm starts only. While
+        they run, their sources are not submitted again and new chunks are
+        limited to the idle workers, so a slow tick does not delay the next.
+        """
+        self.__settings = settings
+        self.__executor: Optional[Executor] = None
+        # Chunks that were still running at a deadline, with their sources
+        self.__late: dict[Future, list[str]] = {}
+        self.__starts: dict[str, FitStart] = {}
+        self.__paths: dict[str, ForecastPath] = {}
+        self.__config = CustomParameters(
+            fit_timeout=settings.fit_timeout,
+            forecast_steps=settings.forecast_steps,
+        )
+        # Expected seconds of a full fit, learned from the observed fits
+        self.__fit_cost = FORECASTERS["triple_es"].cost
+        self.__online: Optional[OnlineTripleES] = None
+        if settings.online_forecast:
+            self.__online = OnlineTripleES(self.__config)
+
+        workers = settings.forecast_workers
+        if workers > 0:
+            if settings.forecast_executor == "thread":
+                self.__executor = ThreadPoolExecutor(max_workers=workers)
+            elif settings.forecast_executor == "process":
+                self.__executor = ProcessPoolExecutor(max_workers=workers)
+            else:
+                raise ValueError(
+                    f"Unknown forecast executor '{settings.forecast_executor}'"
+                )
+
+    def shutdown(self) -> None:
+        if self.__executor is not None:
+            self.__executor.shutdown(wait=False, cancel_futures=True)
+
+    def models(self) -> dict[str, tuple]:
+        """
+        Returns (state, total, start) of every source: its online state and
+        the number of timestamps applied to it, and the warm start of its fit.
+        """
+        states = {} if self.__online is None else self.__online.states()
+        return {
+            name: (*states.get(name, (None, None)), self.__starts.get(name))
+            for name in states.keys() | self.__starts.keys()
+        }
+
+    def restore_models(self, models: dict[str, tuple]) -> None:
+        """Loads models returned by `models`, e.g. from a checkpoint."""
+        for name, (state, total, start) in models.items():
+            if start is not None:
+                self.__starts[name] = start
+            if state is not None and total is not None and self.__online is not None:
+                self.__online.store(name, state, total)
+
+    def predict_all(
+        self,
+        sources: dict[str, np.ndarray],
+        totals: Optional[dict[str, int]] = None,
+    ) -> dict[str, float]:
+        """
+        Returns predictions of the sources that finished before the deadline.
+        `totals` (timestamps ever appended per source) tells which timestamps
+        are new, they are checked against the forecast path of the source and
+        in online mode update the fitted state instead of a full refit.
+        """
+        online = self.__online is not None and totals is not None
+        predictions = {}
+        for name, data in sources.items():
+            cached = None
+            if totals is not None and name in self.__paths:
+                cached = self.__paths[name].follow(data, totals[name])
+                if cached is not None:
+                    metrics.inc("path_hits")
+            if cached is None and online:
+                cached = self.__online.advance(name, data, totals[name])
+                if cached is not None:
+                    metrics.inc("online_updates")
+                    self._set_path(name, self.__online.state(name), totals)
+            if cached is not None:
+                predictions[name] = cached
+        sources = {
+            name: data for name, data in sources.items() if name not in predictions
+        }
+        if not sources:
+            return predictions
+
+        deadline = self.__settings.forecast_deadline
+        if deadline is not None:
+            deadline += time.monotonic()
+
+        fits, budget = self._plan(sources)
+        items = [(name, sources[name], self.__starts.get(name)) for name in fits]
+        if self.__settings.batch_forecast:
+            results = self._predict_batch(items) if items else []
+        else:
+            metrics.inc("cold_fits", sum(start is None for _, _, start in items))
+            if self.__executor is None:
+                results = self._predict_serial(items, deadline)
+            else:
+                results = self._predict_parallel(items, deadline)
+
+        windows = []
+        for name, state, seconds in results:
+            metrics.observe("predict", seconds)
+            self.__fit_cost += 0.1 * (seconds - self.__fit_cost)
+            if isinstance(state, FitTimeout):
+                metrics.inc("fit_timeouts")
+                logger.warning(f"Prediction for {name} timed out")
+                continue
+            if isinstance(state, Exception):
+                metrics.inc("forecast_failed")
+                self.__starts.pop(name, None)
+                logger.warning(f"Prediction for {name} failed: {state!r}")
+                continue
+            self.__starts[name] = state.fit_start()
+            windows.append(state.window)
+            if online:
+                self.__online.store(name, state, totals[name])
+            self._set_path(name, state, totals)
+            prediction = state.forecast()
+            predictions[name] = prediction
+
+        if windows:
+            metrics.set("fit_window_mean", float(np.mean(windows)))
+            metrics.set("fit_window_max", max(windows))
+
+        missed = len(fits) - len(results)
+        if missed:
+            metrics.inc("forecast_deadline_missed", missed)
+            logger.warning(f"Forecast deadline missed for {missed} source/s")
+
+        for name in sources.keys() - predictions.keys():
+            prediction, budget = self._fallback(name, sources[name], budget)
+            if prediction is not None:
+                predictions[name] = prediction
+        return predictions
+
+    def _set_path(
+        self, name: str, state: HoltState, totals: Optional[dict[str, int]]
+    ) -> None:
+        if totals is None or self.__config.forecast_steps <= 1:
+            self.__paths.pop(name, None)
+            return
+        self.__paths[name] = state.path(self.__config, totals[name])
+
+    def _plan(
+        self, sources: dict[str, np.ndarray]
+    ) -> tuple[list[str], Optional[float]]:
+        """
+        Picks the sources fitted in full within the time budget of the tick,
+        sources without any previous state first. The first source is always
+        fitted, so the fit cost keeps being learned even when its estimate
+        is over the budget.
+        Returns them and the budget left for the cheap forecasters.
+        """
+        budget = self.__settings.forecast_budget
+        if budget is None:
+            return list(sources), None
+
+        budget *= max(1, self.__settings.forecast_workers)
+        known = self.__starts.keys()
+        fits = []
+        for name in sorted(sources, key=lambda name: name in known):
+            if fits and budget < self.__fit_cost:
+                break
+            fits.append(name)
+            budget -= self.__fit_cost
+        metrics.set("tick_full_fits", len(fits))
+        return fits, budget
+
+    def _fallback(
+        self, name: str, data: np.ndarray, budget: Optional[float]
+    ) -> tuple[Optional[float], Optional[float]]:
+        """
+        Forecast of a source without a full fit: the last online state,
+        or the preferred O(1) forecaster within the budget. Fallbacks run in the
+        main process after the deadline, so they never fit a model.
+        Returns the prediction (None if all failed) and the budget left.
+        """
+        prediction = None if self.__online is None else self.__online.latest(name)
+        forecaster = "online_holt"
+        if prediction is None:
+            forecaster, prediction = forecast(
+                data, self.__config, budget, exclude=FITTED_FORECASTERS
+            )
+        if forecaster is None:
+            logger.warning(f"No forecaster could predict {name}")
+            return None, budget
+        metrics.inc(f"fallback_{forecaster}")
+        if budget is not None and forecaster in FORECASTERS:
+            budget -= FORECASTERS[forecaster].cost
+        return prediction, budget
+
+    def _predict_batch(self, items: list[tuple]) -> list[tuple[str, object, float]]:
+        """Fits all sources in one vectorized call, the time is split evenly."""
+        start = time.perf_counter()
+        try:
+            states = fit_holt_states([data for _, data, _ in items], self.__config)
+        except Exception as e:
+            states = [e] * len(items)
+        seconds = (time.perf_counter() - start) / len(items)
+        metrics.observe("batch_fit", seconds * len(items))
+        return [(name, state, seconds) for (name, _, _), state in zip(items, states)]
+
+    def _predict_serial(
+        self, items: list[tuple], deadline: Optional[float]
+    ) -> list[tuple[str, object, float]]:
+        results = []
+        for item in items:
+            if deadline is not None and time.monotonic() > deadline:
+                break
+            results.extend(predict_chunk([item], self.__config))
+        return results
+
+    def _collect_late(self) -> None:
+        """Keeps the fits of the finished late chunks as warm starts."""
+        for future in [future for future in self.__late if future.done()]:
+            del self.__late[future]
+            try:
+                results = future.result()
+            except Exception as e:
+                logger.error(f"Forecasting worker failed: {e!r}")
+                continue
+            for name, state, seconds in results:
+                self.__fit_cost += 0.1 * (seconds - self.__fit_cost)
+                if not isinstance(state, Exception):
+                    self.__starts[name] = state.fit_start()
+                    metrics.inc("late_fits")
+
+    def _predict_parallel(
+        self, items: list[tuple], deadline: Optional[float]
+    ) -> list[tuple[str, object, float]]:
+        # Threads share the buffers, which are written by the next update,
+        # so they get their own copy. Processes get one through pickling.
+        if isinstance(self.__executor, ThreadPoolExecutor):
+            items = [(name, data.copy(), start) for name, data, start in items]
+
+        self._collect_late()
+        busy = set().union(*self.__late.values())
+        items = [item for item in items if item[0] not in busy]
+
+        size = max(1, self.__settings.forecast_chunk)
+        chunks = [items[i : i + size] for i in range(0, len(items), size)]
+        if self.__late:
+            # Chunks queued behind the late ones would miss the deadline too
+            idle = max(0, self.__settings.forecast_workers - len(self.__late))
+            chunks = chunks[:idle]
+        futures = {
+            self.__executor.submit(predict_chunk, chunk, self.__config): chunk
+            for chunk in chunks
+        }
+
+        timeout = None if deadline is None else max(0, deadline - time.monotonic())
+        done, not_done = wait(futures, timeout=timeout)
+        for future in not_done:
+            if not future.cancel():
+                self.__late[future] = [name for name, _, _ in futures[future]]
+        metrics.set("late_chunks", len(self.__late))
+
+        results = []
+        for future in done:
+            try:
+                results.extend(future.result())
+            except Exception as e:
+                logger.error(f"Forecasting worker failed: {e!r}")
+        return results
@@ -1,28 +1,80 @@
 import os
+import math
+import time
 import signal
 
+from collections import deque
+from typing import Iterable, Optional
 from celery import group
 from celery import Celery
+from celery.result import GroupResult
+from redis import Redis
 from loguru import logger
 
 from ads.filter.config import Config
+from ads.core.settings import CoreSettings
+from ads.core.forecast import ForecastPool
+from ads.core.checkpoint import Checkpointer, decode, encode
+from ads.core.metrics import metrics, start_metrics_server
+from ads.core.scheduler import SourceScheduler
+from ads.core.sharding import ShardCoordinator
+from ads.core.serializer import SERIALIZER_NAME, register_serializer
 from ads.input.interface import InputManager
 from ads.core.logger.logger import init_logger
-from ads.detect_algs.detect_system import predict, check_for_anomalies
+from ads.detect_algs.detect_system import check_for_anomalies
 
 
 CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", "redis://redis:6379/0")
 app = Celery("tasks", broker=CELERY_BROKER_URL, backend=CELERY_BROKER_URL)
 
+register_serializer()
+app.conf.accept_content = [SERIALIZER_NAME, "json"]
+app.conf.result_accept_content = [SERIALIZER_NAME, "json"]
+
 
 class CoreManager:
-    def __init__(self, input_manager: InputManager):
+    def __init__(
+        self, input_manager: InputManager, settings: Optional[CoreSettings] = None
+    ):
         """
         This class is used for managing the Core.
         """
         init_logger()
         self.__config = Config()
+        self.__settings = settings or CoreSettings()
         self.__input_manager = input_manager
+        self.__forecast_pool = ForecastPool(self.__settings)
+        self.__scheduler = SourceScheduler(
+            self.__settings.poll_interval, self.__settings.max_sleep
+        )
+        self.__input_manager.logs.add_listener(self.__scheduler.notify)
+
+        self.__shard: Optional[ShardCoordinator] = None
+        if self.__settings.sharding:
+            self.__shard = ShardCoordinator(
+                Redis.from_url(CELERY_BROKER_URL),
+                self.__settings.shard_id,
+                self.__settings.shard_lease_ttl,
+            )
+            # Wake up often enough to renew the lease
+            self.__scheduler.max_sleep = min(
+                self.__scheduler.max_sleep, self.__settings.shard_lease_ttl / 3
+            )
+        # Number of timestamps of each source already sent to the workers
+        self.__dispatched: dict[str, int] = {}
+        # Task groups sent to the workers and not finished yet, with their sources
+        self.__in_flight: deque[tuple[GroupResult, set[str]]] = deque()
+        # Sources of fire-and-forget tasks, whose end cannot be observed,
+        # with the time until which they are considered in flight
+        self.__in_flight_until: dict[str, float] = {}
+
+        self.__checkpoint: Optional[Checkpointer] = None
+        if self.__settings.checkpoint:
+            self.__checkpoint = Checkpointer(
+                self.__settings.checkpoint, self.__settings.checkpoint_interval
+            )
+
+        start_metrics_server(self.__settings.metrics_port)
 
         # Signal handling for graceful shutdown
         signal.signal(signal.SIGINT, self._handle_shutdown)
@@ -33,60 +85,260 @@ class CoreManager:
         Handles the shutdown of the Core.
         """
         logger.info("Shutting down Core...")
+        self._save_checkpoint(force=True)
+        self.__forecast_pool.shutdown()
+        if self.__shard is not None:
+            self.__shard.release()
         exit(0)
 
     def _get_logs(self) -> None:
-        self.__input_manager.fetch_logs(self.__config.filters)
+        with metrics.timer("fetch_logs"):
+            self.__input_manager.fetch_logs(self.__config.filters)
+
+    def _save_checkpoint(self, force: bool = False) -> None:
+        """Snapshots the models and high-water marks when the interval passed."""
+        if self.__checkpoint is None or not (force or self.__checkpoint.due()):
+            return
+        with metrics.timer("checkpoint"):
+            data = encode(
+                self.__forecast_pool.models(),
+                self.__dispatched,
+                self.__input_manager.logs,
+            )
+            self.__checkpoint.save(data)
+        metrics.set("checkpoint_bytes", len(data))
+
+    def _restore_checkpoint(self) -> None:
+        """
+        Loads the snapshot after the logs are fetched, only the timestamps
+        newer than its high-water marks are applied and sent again.
+        """
+        if self.__checkpoint is None:
+            return
+        data = self.__checkpoint.load()
+        if data is None:
+            return
+        try:
+            models, dispatched = decode(data, self.__input_manager.logs)
+        except Exception as e:
+            logger.error(f"Cannot restore checkpoint, starting cold: {e!r}")
+            return
+        self.__forecast_pool.restore_models(models)
+        self.__dispatched.update(dispatched)
+        logger.info(f"Restored checkpoint of {len(models)} source/s")
+
+    def _refresh_shard(self) -> None:
+        """
+        Renews the shard lease, after a rebalance all sources of this
+        instance are processed again on the next tick.
+        """
+        if self.__shard is None or not self.__shard.refresh():
+            return
+        logs = self.__input_manager.logs
+        self.__scheduler.retry([name for name in logs if self.__shard.owns(name)])
 
-    def _core_func(self):
+    def _new_timestamps(self, name: str, value) -> tuple:
+        """
+        Returns the timestamps to send for the source and its new high-water mark.
+        In delta mode only the timestamps appended since the last dispatch are sent.
+        """
+        total = self.__input_manager.logs.total(name)
+        if not self.__settings.delta_payloads:
+            return value, total
 
-        tasks = []
-        for name, value in self.__input_manager.logs.items():
+        new = total - self.__dispatched.get(name, 0)
+        if new < len(value):
+            value = value[len(value) - new :]
+        return value, total
+
+    def _core_func(self, names: Optional[Iterable[str]] = None):
+        """
+        Predicts and dispatches the given sources, all sources if None.
+        Returns the sources left without a forecast (deadline or failure).
+        """
+        logs = self.__input_manager.logs
+        if names is None:
+            names = logs.keys()
+        if self.__shard is not None:
+            names = [name for name in names if self.__shard.owns(name)]
+
+        busy = self._collect_finished()
+        deferred = set()
+        sources = {}
+        new_timestamps = {}
+        for name in names:
+            value = logs[name]
             if len(value) < 15:
                 continue
-            prediction = predict(value)
-            tasks.append(
-                app.signature(
-                    "tasks.process_logs", args=[name, value.tolist(), prediction]
-                )
+            if name in busy:
+                # Keep the order of tasks of the source, send it after they finish
+                deferred.add(name)
+                continue
+            timestamps, total = self._new_timestamps(name, value)
+            if len(timestamps) == 0:
+                # The worker would only report "No new logs"
+                continue
+            sources[name] = value
+            new_timestamps[name] = (timestamps, total)
+
+        with metrics.timer("forecast"):
+            predictions = self.__forecast_pool.predict_all(
+                sources, {name: total for name, (_, total) in new_timestamps.items()}
             )
 
+        items = []
+        dispatched = {}
+        for name, prediction in predictions.items():
+            timestamps, total = new_timestamps[name]
+            if self.__settings.task_serializer == "json":
+                timestamps = timestamps.tolist()
+            items.append((name, timestamps, prediction))
+            dispatched[name] = total
+
+        with metrics.timer("build_tasks"):
+            tasks = self._build_tasks(items)
         if tasks:
-            job = group(tasks)
-            group_result = job.apply_async()
-            group_result.join()
+            self._dispatch(tasks, set(dispatched))
+            self.__dispatched.update(dispatched)
+
+        metrics.set("tick_sources", len(sources))
+        metrics.set("tick_dispatched", len(dispatched))
+        metrics.set("tick_deferred", len(deferred))
+        metrics.set("in_flight_groups", len(self.__in_flight))
+        return deferred | (set(sources) - set(predictions))
+
+    def _build_tasks(self, items: list[tuple]) -> list:
+        """
+        Builds the task signatures of the (name, timestamps, prediction) items.
+        Items are split into even chunks of at most `dispatch_batch` sources,
+        each chunk is one `process_logs_batch` message.
+        """
+        options = {
+            "ignore_result": self.__settings.dispatch_ignore_result,
+            "serializer": self.__settings.task_serializer,
+        }
+        size = self.__settings.dispatch_batch
+        if size <= 1:
+            return [
+                app.signature("tasks.process_logs", args=list(item), **options)
+                for item in items
+            ]
+
+        chunks = math.ceil(len(items) / size)
+        return [
+            app.signature(
+                "tasks.process_logs_batch", args=[items[i::chunks]], **options
+            )
+            for i in range(chunks)
+        ]
+
+    def _collect_finished(self) -> set[str]:
+        """
+        Forgets the finished task groups and the expired fire-and-forget ones.
+        Returns the sources that still have tasks in flight.
+        """
+        self.__in_flight = deque(
+            (result, names) for result, names in self.__in_flight if not result.ready()
+        )
+        now = time.monotonic()
+        self.__in_flight_until = {
+            name: until for name, until in self.__in_flight_until.items() if until > now
+        }
+        return set(self.__in_flight_until).union(
+            *(names for _, names in self.__in_flight)
+        )
+
+    def _dispatch(self, tasks: list, names: set[str]) -> None:
+        """
+        Sends the tasks to the workers. Without a dispatch window it waits
+        for them, otherwise only when the window of task groups is full.
+        Fire-and-forget tasks have no result to wait for, their sources count
+        as in flight for `dispatch_ignore_ttl` seconds.
+        """
+        with metrics.timer("apply_async"):
+            group_result = group(tasks).apply_async()
+        metrics.inc("tasks_sent", len(tasks))
+        if self.__settings.dispatch_ignore_result:
+            until = time.monotonic() + self.__settings.dispatch_ignore_ttl
+            self.__in_flight_until.update(dict.fromkeys(names, until))
+            return
+
+        window = self.__settings.dispatch_window
+        if window <= 0:
+            with metrics.timer("join"):
+                group_result.join()
             logger.info("All tasks completed")
+            return
+
+        self.__in_flight.append((group_result, names))
+        while len(self.__in_flight) > window:
+            oldest, _ = self.__in_flight.popleft()
+            with metrics.timer("join"):
+                oldest.join()
+
+    def _start(self) -> None:
+        """
+        Fetches the logs and processes all sources once.
+        """
+        self._refresh_shard()
+        self._get_logs()
+        self._restore_checkpoint()
+        missed = self._core_func(self.__scheduler.changed(self.__input_manager))
+        self.__scheduler.reschedule(
+            self.__input_manager, list(self.__input_manager.logs.keys())
+        )
+        self.__scheduler.retry(missed)
+
+    def _tick(self, *args) -> bool:
+        """
+        Sleeps until a source is due, updates the logs and processes only
+        the sources with new timestamps.
+        Returns the result of the input manager update.
+        """
+        self.__scheduler.wait()
+        start = time.perf_counter()
+        self._refresh_shard()
+        with metrics.timer("update"):
+            result = self.__input_manager.update(*args)
+
+        due = self.__scheduler.pop_due(time.time())
+        changed = self.__scheduler.changed(self.__input_manager)
+        missed = self._core_func(changed) if changed else set()
+        self.__scheduler.reschedule(self.__input_manager, set(due) | set(changed))
+        self.__scheduler.retry(missed)
+
+        self._save_checkpoint()
+
+        metrics.observe("tick", time.perf_counter() - start)
+        metrics.set("scheduled_sources", self.__scheduler.pending())
+        metrics.log_summary(self.__settings.metrics_log_interval)
+        return result
 
     def _core_loop(self) -> None:
         """
         Starts the core loop.
         """
         logger.info("Starting Core Loop")
-        self._get_logs()
+        self._start()
         while True:
-            self._core_func()
-            self.__input_manager.update()
+            self._tick()
 
     def run(self) -> None:
         """Main function"""
         self._core_loop()
 
     def test_1(self):
-        self._get_logs()
-        self._core_func()
-        while not self.__input_manager.update():
+        self._start()
+        while not self._tick():
             ...
         for _ in range(350):
-            self._core_func()
-            self.__input_manager.update()
+            self._tick()
 
         logger.info("Test 1 finished")
 
     def test_2(self):
-        self._get_logs()
-        self._core_func()
-        res = self.__input_manager.update(True)
+        self._start()
+        res = self._tick(True)
         while res:
-            self._core_func()
-            res = self.__input_manager.update()
+            res = self._tick()
         logger.info("Test 2 finished")
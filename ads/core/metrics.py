@@ -0,0 +1,148 @@
+import time
+import threading
+import numpy as np
+
+from typing import Optional
+from loguru import logger
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class LatencySummary:
+    def __init__(self, window: int = 1024):
+        """
+        Latency of one stage: count and sum of all observations and
+        a ring of the last `window` ones for the quantiles.
+        """
+        self.count = 0
+        self.total = 0.0
+        self.__samples = np.zeros(window)
+
+    def observe(self, seconds: float) -> None:
+        self.__samples[self.count % len(self.__samples)] = seconds
+        self.count += 1
+        self.total += seconds
+
+    def quantiles(self) -> dict[float, float]:
+        samples = self.__samples[: min(self.count, len(self.__samples))]
+        if len(samples) == 0:
+            return {q: float("nan") for q in QUANTILES}
+        values = np.quantile(samples, QUANTILES)
+        return dict(zip(QUANTILES, values))
+
+
+class Metrics:
+    def __init__(self):
+        """
+        Timings, counters and gauges of the Core, rendered in the
+        Prometheus text format and summarized in the log.
+        """
+        self.stages: dict[str, LatencySummary] = {}
+        self.counters: dict[str, float] = {}
+        self.gauges: dict[str, float] = {}
+        self.__lock = threading.Lock()
+        self.__logged_at = time.monotonic()
+
+    def observe(self, stage: str, seconds: float) -> None:
+        with self.__lock:
+            if stage not in self.stages:
+                self.stages[stage] = LatencySummary()
+            self.stages[stage].observe(seconds)
+
+    @contextmanager
+    def timer(self, stage: str):
+        """Measures the duration of the `with` block as the stage latency."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def inc(self, name: str, value: float = 1) -> None:
+        with self.__lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def set(self, name: str, value: float) -> None:
+        with self.__lock:
+            self.gauges[name] = value
+
+    def render(self) -> str:
+        """Returns the metrics in the Prometheus text exposition format."""
+        lines = [
+            "# HELP ads_stage_seconds Latency of the Core stages.",
+            "# TYPE ads_stage_seconds summary",
+        ]
+        with self.__lock:
+            for stage, summary in sorted(self.stages.items()):
+                for q, value in summary.quantiles().items():
+                    lines.append(
+                        f'ads_stage_seconds{{stage="{stage}",quantile="{q}"}} {value}'
+                    )
+                lines.append(
+                    f'ads_stage_seconds_sum{{stage="{stage}"}} {summary.total}'
+                )
+                lines.append(
+                    f'ads_stage_seconds_count{{stage="{stage}"}} {summary.count}'
+                )
+            for name, value in sorted(self.counters.items()):
+                lines.append(f"# TYPE ads_{name}_total counter")
+                lines.append(f"ads_{name}_total {value}")
+            for name, value in sorted(self.gauges.items()):
+                lines.append(f"# TYPE ads_{name} gauge")
+                lines.append(f"ads_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> str:
+        """Returns one line with p50/p95/p99 in ms of every stage and the gauges."""
+        with self.__lock:
+            stages = []
+            for stage, latency in sorted(self.stages.items()):
+                p50, p95, p99 = (v * 1000 for v in latency.quantiles().values())
+                stages.append(f"{stage} {p50:.1f}/{p95:.1f}/{p99:.1f}")
+            gauges = [
+                f"{name}={value:g}" for name, value in sorted(self.gauges.items())
+            ]
+        return "p50/p95/p99 ms: " + ", ".join(stages) + " | " + " ".join(gauges)
+
+    def log_summary(self, interval: float) -> None:
+        """Logs the summary if `interval` seconds passed since the last one."""
+        now = time.monotonic()
+        if interval <= 0 or now - self.__logged_at < interval:
+            return
+        self.__logged_at = now
+        logger.info(f"Core metrics {self.summary()}")
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = metrics.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port: int) -> Optional[ThreadingHTTPServer]:
+    """Serves /metrics on the port in a daemon thread, 0 disables it."""
+    if port <= 0:
+        return None
+    try:
+        server = ThreadingHTTPServer(("", port), _MetricsHandler)
+    except OSError as e:
+        logger.error(f"Cannot start metrics endpoint on port {port}: {e}")
+        return None
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logger.info(f"Metrics endpoint on http://localhost:{port}/metrics")
+    return server
+
+
+metrics = Metrics()
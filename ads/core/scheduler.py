@@ -0,0 +1,100 @@
+import time
+import heapq
+import threading
+
+from typing import Iterable, Optional
+
+from ads.input.interface import InputManager
+
+
+class SourceScheduler:
+    def __init__(self, poll_interval: float, max_sleep: float):
+        """
+        Priority queue of the next time each source has useful work,
+        i.e. new timestamps are expected. The Core sleeps until the
+        earliest one: input managers are polled on the Core thread, so
+        wakeups are timer-based and new data is seen by the next poll.
+        :poll_interval: delay for sources without an arrival hint
+        :max_sleep: the longest the Core sleeps without polling
+        """
+        self.poll_interval = poll_interval
+        self.max_sleep = max_sleep
+
+        self.__heap: list[tuple[float, str]] = []
+        self.__due: dict[str, float] = {}
+        self.__seen: dict[str, int] = {}
+        self.__lock = threading.Lock()
+
+    def schedule(self, source: str, when: float) -> None:
+        """Sets the next due time of the source, replacing the previous one."""
+        with self.__lock:
+            self.__due[source] = when
+            heapq.heappush(self.__heap, (when, source))
+
+    def pending(self) -> int:
+        """Returns the number of scheduled sources."""
+        return len(self.__due)
+
+    def notify(self, source: str) -> None:
+        """Makes the source due now, e.g. when timestamps were appended."""
+        self.schedule(source, time.time())
+
+    def next_due(self) -> Optional[float]:
+        with self.__lock:
+            # Drop entries replaced by a later `schedule` call
+            while (
+                self.__heap and self.__due.get(self.__heap[0][1]) != self.__heap[0][0]
+            ):
+                heapq.heappop(self.__heap)
+            return self.__heap[0][0] if self.__heap else None
+
+    def wait(self) -> None:
+        """Sleeps until the earliest due time, at most `max_sleep` seconds."""
+        due = self.next_due()
+        timeout = self.max_sleep
+        if due is not None:
+            timeout = min(max(0.0, due - time.time()), timeout)
+        if timeout > 0:
+            time.sleep(timeout)
+
+    def pop_due(self, now: float) -> list[str]:
+        """Removes and returns the sources due at `now`."""
+        sources = []
+        with self.__lock:
+            while self.__heap and self.__heap[0][0] <= now:
+                when, source = heapq.heappop(self.__heap)
+                if self.__due.get(source) == when:
+                    del self.__due[source]
+                    sources.append(source)
+        return sources
+
+    def changed(self, input_manager: InputManager) -> list[str]:
+        """Returns the sources with timestamps appended since the last call."""
+        logs = input_manager.logs
+        sources = []
+        for name in logs:
+            total = logs.total(name)
+            if self.__seen.get(name) != total:
+                self.__seen[name] = total
+                sources.append(name)
+        return sources
+
+    def retry(self, sources: Iterable[str]) -> None:
+        """Reports the sources as changed again after the poll interval."""
+        when = time.time() + self.poll_interval
+        for name in sources:
+            self.__seen.pop(name, None)
+            self.schedule(name, when)
+
+    def reschedule(self, input_manager: InputManager, sources: Iterable[str]) -> None:
+        """
+        Schedules the sources at their next expected arrival. Sources without
+        a hint, or with one already in the past, are polled again later.
+        """
+        now = time.time()
+        for name in sources:
+            when = input_manager.next_arrival(name)
+            if when is None or when <= now:
+                when = now + self.poll_interval
+            if when != float("inf"):
+                self.schedule(name, when)
@@ -0,0 +1,133 @@
+import os
+import socket
+
+from typing import Optional
+from dataclasses import dataclass, field
+
+
+def env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def env_float(name: str, default: Optional[float] = None) -> Optional[float]:
+    """Empty or 0 means no value (e.g. no deadline)."""
+    value = os.getenv(name)
+    if not value or float(value) <= 0:
+        return default
+    return float(value)
+
+
+def env_seconds(name: str, default: float) -> float:
+    """Only empty means the default, 0 is kept (e.g. to disable a periodic task)."""
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def env_str(name: str, default: str) -> str:
+    return os.getenv(name) or default
+
+
+@dataclass
+class CoreSettings:
+    """
+    Tuning of the Core, every field can be set by its environment variable.
+    delta_payloads - send only the timestamps that arrived since the last dispatch
+    forecast_workers - number of forecasting workers, 0 predicts in the main process
+    forecast_executor - "process" or "thread" pool for the forecasting workers
+    forecast_chunk - number of sources sent to a forecasting worker at once
+    forecast_deadline - seconds a tick waits for forecasts (None = no deadline)
+    forecast_budget - seconds of full fits per tick and worker (None = no limit)
+    fit_timeout - seconds after which a single fit is cancelled (None = no limit)
+    forecast_steps - arrivals forecast by one fit and reused while they are on time
+    online_forecast - update fitted models with new timestamps instead of refitting
+    batch_forecast - fit all sources of a tick together with the vectorized fitter
+    poll_interval - seconds between polls of sources without an arrival hint
+    max_sleep - the longest the Core sleeps without polling the input manager
+    dispatch_window - task groups in flight before the Core waits, 0 waits for each
+    dispatch_ignore_result - fire and forget tasks, results are not stored
+    dispatch_ignore_ttl - seconds a fire and forget task of a source counts as in flight
+    dispatch_batch - max sources per task message, 1 sends a task per source
+    task_serializer - "ads-msgpack" (binary timestamp arrays) or "json"
+    metrics_port - port of the Prometheus /metrics endpoint, 0 disables it
+    metrics_log_interval - seconds between metric summaries in the log, 0 disables it
+    sharding - split the sources between all ads instances sharing the Redis
+    shard_id - name of this instance in the shard ring
+    shard_lease_ttl - seconds after which a silent instance loses its sources
+    checkpoint - file path or redis:// URL of the state snapshot, empty disables it
+    checkpoint_interval - seconds between state snapshots
+    """
+
+    delta_payloads: bool = field(
+        default_factory=lambda: env_bool("ADS_DELTA_PAYLOADS", True)
+    )
+    forecast_workers: int = field(
+        default_factory=lambda: env_int("ADS_FORECAST_WORKERS", 0)
+    )
+    forecast_executor: str = field(
+        default_factory=lambda: env_str("ADS_FORECAST_EXECUTOR", "process")
+    )
+    forecast_chunk: int = field(
+        default_factory=lambda: env_int("ADS_FORECAST_CHUNK", 8)
+    )
+    forecast_deadline: Optional[float] = field(
+        default_factory=lambda: env_float("ADS_FORECAST_DEADLINE")
+    )
+    forecast_budget: Optional[float] = field(
+        default_factory=lambda: env_float("ADS_FORECAST_BUDGET")
+    )
+    fit_timeout: Optional[float] = field(
+        default_factory=lambda: env_float("ADS_FIT_TIMEOUT")
+    )
+    forecast_steps: int = field(
+        default_factory=lambda: env_int("ADS_FORECAST_STEPS", 16)
+    )
+    online_forecast: bool = field(
+        default_factory=lambda: env_bool("ADS_ONLINE_FORECAST", True)
+    )
+    batch_forecast: bool = field(
+        default_factory=lambda: env_bool("ADS_BATCH_FORECAST", False)
+    )
+    poll_interval: float = field(
+        default_factory=lambda: env_float("ADS_POLL_INTERVAL", 1.0)
+    )
+    max_sleep: float = field(default_factory=lambda: env_float("ADS_MAX_SLEEP", 60.0))
+    dispatch_window: int = field(
+        default_factory=lambda: env_int("ADS_DISPATCH_WINDOW", 4)
+    )
+    dispatch_ignore_result: bool = field(
+        default_factory=lambda: env_bool("ADS_DISPATCH_IGNORE_RESULT", False)
+    )
+    dispatch_ignore_ttl: float = field(
+        default_factory=lambda: env_float("ADS_DISPATCH_IGNORE_TTL", 10.0)
+    )
+    dispatch_batch: int = field(
+        default_factory=lambda: env_int("ADS_DISPATCH_BATCH", 32)
+    )
+    task_serializer: str = field(
+        default_factory=lambda: env_str("ADS_TASK_SERIALIZER", "ads-msgpack")
+    )
+    metrics_port: int = field(default_factory=lambda: env_int("ADS_METRICS_PORT", 0))
+    metrics_log_interval: float = field(
+        default_factory=lambda: env_seconds("ADS_METRICS_LOG_INTERVAL", 60.0)
+    )
+    sharding: bool = field(default_factory=lambda: env_bool("ADS_SHARDING", False))
+    shard_id: str = field(
+        default_factory=lambda: env_str(
+            "ADS_SHARD_ID", f"{socket.gethostname()}-{os.getpid()}"
+        )
+    )
+    shard_lease_ttl: float = field(
+        default_factory=lambda: env_float("ADS_SHARD_LEASE_TTL", 15.0)
+    )
+    checkpoint: str = field(default_factory=lambda: env_str("ADS_CHECKPOINT", ""))
+    checkpoint_interval: float = field(
+        default_factory=lambda: env_float("ADS_CHECKPOINT_INTERVAL", 60.0)
+    )
@@ -0,0 +1,99 @@
+import math
+import time
+import bisect
+import hashlib
+
+from typing import Iterable, Optional
+from loguru import logger
+from redis import Redis
+from redis.exceptions import RedisError
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], "big")
+
+
+class HashRing:
+    def __init__(self, members: Iterable[str], replicas: int = 64):
+        """
+        Consistent hash ring, every member owns `replicas` points on the ring
+        and a key belongs to the member of the first point after its hash.
+        """
+        self.members = frozenset(members)
+        self.__points = sorted(
+            (_hash(f"{member}#{i}"), member)
+            for member in self.members
+            for i in range(replicas)
+        )
+        self.__hashes = [point for point, _ in self.__points]
+
+    def owner(self, key: str) -> Optional[str]:
+        if not self.__points:
+            return None
+        i = bisect.bisect(self.__hashes, _hash(key)) % len(self.__points)
+        return self.__points[i][1]
+
+
+class ShardCoordinator:
+    PREFIX = "ads:shard:"
+
+    def __init__(self, redis: Redis, instance_id: str, lease_ttl: float):
+        """
+        Splits the sources between the running ads instances.
+        Every instance keeps a lease key with TTL in Redis, the live leases
+        form the hash ring. A dead instance's lease expires and its sources
+        move to the others, a new instance takes its part on its first lease.
+        """
+        self.instance_id = instance_id
+        self.lease_ttl = lease_ttl
+        self.__redis = redis
+        self.__ring = HashRing([instance_id])
+        self.__renewed_at: Optional[float] = None
+
+    @property
+    def members(self) -> frozenset[str]:
+        return self.__ring.members
+
+    def owns(self, source: str) -> bool:
+        return self.__ring.owner(source) == self.instance_id
+
+    def refresh(self) -> bool:
+        """
+        Renews the lease (at most every third of its TTL) and rebuilds
+        the ring. Returns True if the members changed.
+        """
+        now = time.monotonic()
+        if self.__renewed_at is not None and now - self.__renewed_at < (
+            self.lease_ttl / 3
+        ):
+            return False
+        self.__renewed_at = now
+
+        try:
+            self.__redis.set(
+                self.PREFIX + self.instance_id,
+                time.time(),
+                ex=max(1, math.ceil(self.lease_ttl)),
+            )
+            members = {
+                key.decode()[len(self.PREFIX) :]
+                for key in self.__redis.scan_iter(match=self.PREFIX + "*")
+            }
+        except RedisError as e:
+            logger.warning(f"Cannot renew shard lease, keeping current shard: {e}")
+            return False
+
+        members.add(self.instance_id)
+        if members == self.__ring.members:
+            return False
+
+        self.__ring = HashRing(members)
+        logger.info(f"Shard members changed: {sorted(members)}")
+        return True
+
+    def release(self) -> None:
+        """Gives the sources of this instance to the others."""
+        try:
+            self.__redis.delete(self.PREFIX + self.instance_id)
+        except RedisError as e:
+            logger.warning(f"Cannot release shard lease: {e}")
@@ -2,8 +2,11 @@ import numpy as np
 import pandas as pd
 from loguru import logger
 
+from typing import Optional
+
 from ads.detect_algs.dwt_mlead.algorithm import main as dwt_mlead_detection
-from ads.detect_algs.triple_es.algorithm import triple_es_predict
+from ads.detect_algs.triple_es.algorithm import CustomParameters
+from ads.detect_algs.forecasters import forecast
 
 
 def calculate_jaccard_index(set1: set[int], set2: set[int]) -> float:
@@ -210,14 +213,19 @@ def check_for_anomalies(name: str, data: np.ndarray) -> bool:
             )
 
 
-def predict(data: np.ndarray):
+def predict(
+    data: np.ndarray,
+    config: CustomParameters = CustomParameters(),
+    budget: Optional[float] = None,
+):
     """
     Func that predicts the next values.
+    Uses the preferred forecaster within the time `budget` in seconds,
+    a failed one falls back to the cheaper ones (see forecasters.py).
     """
     # offset = get_offset(data)
 
-    if len(data) > 10:
-        predictions = triple_es_predict(data)
+    _, predictions = forecast(data, config, budget)
 
     # logger.info(f"Predictions: \n{predictions}")
 
@@ -3,6 +3,7 @@ import pandas as pd
 
 from dataclasses import dataclass
 from .dwt_mlead import DWT_MLEAD
+from .batch import BatchDWT_MLEAD, pad_series_batch
 
 
 @dataclass
@@ -54,6 +55,41 @@ def main(data: np.ndarray, config: CustomParameters = CustomParameters()):
     # detector.plot(coefs=False, point_anomaly_scores=point_scores)
 
 
+def main_batch(
+    series: list[np.ndarray], config: CustomParameters = CustomParameters()
+) -> list[tuple[list, list]]:
+    """
+    Detects the anomalies of many series at once. Series are grouped by the
+    power of two `main` pads them to, one batch per group, so every series
+    gets the (point anomalies, cluster anomalies) of `main`.
+    """
+    groups: dict[int, list[int]] = {}
+    for i, x in enumerate(series):
+        groups.setdefault(int(np.ceil(np.log2(len(x)))), []).append(i)
+
+    results: list = [None] * len(series)
+    for indices in groups.values():
+        data, lengths = pad_series_batch([series[i] for i in indices])
+        detector = BatchDWT_MLEAD(
+            data,
+            start_level=config.start_level,
+            quantile_boundary_type="percentile",
+            quantile_epsilon=config.quantile_epsilon,
+            lengths=lengths,
+        )
+        point_scores = detector.detect()
+        clusters = detector.find_cluster_anomalies(
+            point_scores, d_max=2.5, anomaly_counter_threshold=2
+        )
+
+        for i, scores, row_clusters in zip(indices, point_scores, clusters):
+            cluster_anom: list = []
+            for c in row_clusters:
+                cluster_anom.extend(c.points)
+            results[i] = (np.flatnonzero(scores > 0).tolist(), cluster_anom)
+    return results
+
+
 if __name__ == "__main__":
     config = CustomParameters()
     main(config)
@@ -0,0 +1,134 @@
+import pywt as wt
+import numpy as np
+
+from typing import Optional
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .dwt_mlead import (
+    AnomalyCluster,
+    find_cluster_anomalies,
+    mark_anomalous_windows,
+    reverse_windowing,
+)
+
+
+def pad_series_batch(series: list[np.ndarray]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Pads every series periodically to the power-of-two length of the longest
+    one. Returns the (series, length) matrix and the length of every series.
+    A series shorter than that is scored against the longer padding and
+    differs from DWT_MLEAD on it alone, which pads to its own power of two.
+    """
+    lengths = np.array([len(x) for x in series])
+    m = int(np.power(2, np.ceil(np.log2(lengths.max()))))
+    data = np.empty((len(series), m))
+    for i, x in enumerate(series):
+        data[i] = wt.pad(np.asarray(x, dtype=np.float64), (0, m - len(x)), "periodic")
+    return data, lengths
+
+
+class BatchDWT_MLEAD:
+    def __init__(
+        self,
+        data: np.ndarray,
+        start_level: int,
+        quantile_boundary_type: str,
+        quantile_epsilon: float,
+        lengths: Optional[np.ndarray] = None,
+    ):
+        """
+        DWT_MLEAD of every row of `data`, series padded to a common
+        power-of-two length (see `pad_series_batch`), `lengths` are their
+        lengths before padding. The Haar levels, Gaussians and quantiles of
+        all rows are computed together, a row of the full length gets the
+        scores of DWT_MLEAD(row).detect(): the likelihoods differ by rounding
+        only, and windows tied with the quantile are never marked.
+        """
+        self.data = np.asarray(data, dtype=np.float64)
+        self.rows, self.m = self.data.shape
+        if self.m < 2 or self.m & (self.m - 1):
+            raise ValueError(f"Series length {self.m} is not a power of two")
+        self.lengths = (
+            np.full(self.rows, self.m) if lengths is None else np.asarray(lengths)
+        )
+        self.start_level = start_level
+        self.max_level = int(np.log2(self.m))
+        self.quantile_boundary_type = quantile_boundary_type
+        self.quantile_epsilon = quantile_epsilon
+
+        self.window_sizes = np.array(
+            [
+                max(2, self.max_level - l - self.start_level + 1)
+                for l in range(self.max_level)
+            ]
+        )
+
+    def detect(self) -> np.ndarray:
+        """Returns the point anomaly scores, 0 past the length of a row."""
+        if self.quantile_boundary_type != "percentile":
+            raise ValueError(
+                f"The quantile boundary type '{self.quantile_boundary_type}' is not implemented yet!"
+            )
+
+        counter = np.zeros((self.rows, self.m))
+        a = self.data
+        # skip last level, because we cannot slide a window of size 2 over it (too small)
+        for level in range(1, self.max_level):
+            a, d = wt.dwt(a, "haar", "periodic", axis=-1)
+            if level < self.start_level:
+                continue
+            for x in (d, a):
+                window_size = self.window_sizes[level]
+                x_view = sliding_window_view(x, window_size, axis=-1)
+
+                p = self._estimate_gaussian_likelihoods(x_view)
+                z_eps = np.percentile(
+                    p, self.quantile_epsilon * 100, axis=1, keepdims=True
+                )
+                xa = reverse_windowing(
+                    mark_anomalous_windows(p, z_eps),
+                    window_length=window_size,
+                    full_length=x.shape[1],
+                    reduction=np.sum,
+                    fill_value=0,
+                )
+                counter += xa.repeat(self.m // x.shape[1], axis=1)
+
+        # delete event counters with count < 2
+        counter[counter < 2] = 0
+        counter[np.arange(self.m) >= self.lengths[:, None]] = 0
+        return counter
+
+    @staticmethod
+    def _estimate_gaussian_likelihoods(x_view: np.ndarray) -> np.ndarray:
+        """
+        Log likelihoods of the (rows, windows, size) windows under the
+        Gaussian of the windows of their row, as EmpiricalCovariance.score.
+        """
+        centered = x_view - x_view.mean(axis=1, keepdims=True)
+        covariance = centered.transpose(0, 2, 1) @ centered / x_view.shape[1]
+        # pseudo-inverse with the cutoff of scipy.linalg.pinvh, as get_precision
+        s, u = np.linalg.eigh(covariance)
+        cutoff = (
+            np.abs(s).max(axis=1, keepdims=True) * s.shape[1] * np.finfo(s.dtype).eps
+        )
+        inverse = np.divide(1.0, s, out=np.zeros_like(s), where=np.abs(s) > cutoff)
+        precision = (u * inverse[:, None, :]) @ u.transpose(0, 2, 1)
+        sign, logdet = np.linalg.slogdet(precision)
+        logdet = np.where(sign > 0, logdet, -np.inf)
+        dims = x_view.shape[2]
+
+        quad = np.sum((centered @ precision) * centered, axis=2)
+        return (-quad + logdet[:, None] - dims * np.log(2 * np.pi)) / 2.0
+
+    def find_cluster_anomalies(
+        self,
+        point_anomaly_scores: np.ndarray,
+        d_max: float,
+        anomaly_counter_threshold: float,
+    ) -> list[list[AnomalyCluster]]:
+        """Clusters of the anomalous points of every row."""
+        return [
+            find_cluster_anomalies(scores[:length], d_max, anomaly_counter_threshold)
+            for scores, length in zip(point_anomaly_scores, self.lengths)
+        ]
@@ -0,0 +1,83 @@
+"""
+Micro-benchmark of `reverse_windowing` against the windows matrix it
+replaced, on the shapes DWT_MLEAD uses: anomaly flags of every window
+summed back to the coefficients (fill 0), and the mean with fill NaN.
+
+Usage: python -m ads.detect_algs.dwt_mlead.benchmark [--lengths 1000 100000]
+       [--windows 4 16 64] [--repeats 5]
+"""
+
+import time
+import argparse
+import tracemalloc
+import numpy as np
+
+from .dwt_mlead import _reverse_windowing_matrix, reverse_windowing
+
+IMPLEMENTATIONS = {
+    "matrix": _reverse_windowing_matrix,
+    "cumsum": reverse_windowing,
+}
+CASES = {
+    "sum": (np.sum, 0),
+    "mean": (np.mean, np.nan),
+}
+
+
+def measure(func, args: tuple, repeats: int) -> tuple[float, int]:
+    """Returns the best time of `repeats` calls and the peak memory of one."""
+    seconds = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func(*args)
+        seconds.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    func(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return min(seconds), peak
+
+
+def run(args: argparse.Namespace) -> None:
+    rng = np.random.default_rng(42)
+    for length in args.lengths:
+        for window in args.windows:
+            if window > length:
+                continue
+            flags = rng.random(length - window + 1) > 0.99
+            for case, (reduction, fill_value) in CASES.items():
+                call = (flags, window, length, reduction, fill_value)
+                expected = _reverse_windowing_matrix(*call)
+                if not np.allclose(reverse_windowing(*call), expected, equal_nan=True):
+                    raise AssertionError(f"Different output for {call[1:]}")
+
+                timings = {
+                    name: measure(func, call, args.repeats)
+                    for name, func in IMPLEMENTATIONS.items()
+                }
+                (old, old_peak), (new, new_peak) = timings.values()
+                print(
+                    f"n={length:<8} w={window:<4} {case:<4} "
+                    f"matrix {old * 1000:9.3f} ms {old_peak / 1024:10.1f} KiB  "
+                    f"cumsum {new * 1000:9.3f} ms {new_peak / 1024:10.1f} KiB  "
+                    f"x{old / new:.1f}"
+                )
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--lengths", nargs="+", type=int, default=[1_000, 10_000, 100_000]
+    )
+    parser.add_argument("--windows", nargs="+", type=int, default=[4, 16, 64])
+    parser.add_argument("--repeats", type=int, default=5)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    run(parse_args(argv))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,13 +2,18 @@ import pywt as wt
 import warnings
 import numpy as np
 
-from sklearn.cluster import DBSCAN
 from sklearn.covariance import EmpiricalCovariance
+from sklearn.utils.extmath import fast_logdet
 from typing import Callable, NamedTuple, Optional, Any
 from numpy.lib.stride_tricks import sliding_window_view
 
 warnings.filterwarnings(action="ignore", category=UserWarning)
 
+# Windows scored at once, bounds the (windows, size, size) temporary
+LIKELIHOOD_CHUNK = 4096
+# Likelihoods closer than this (relative to the largest of a level) are tied
+TIE_RTOL = 1e-9
+
 
 class AnomalyCluster(NamedTuple):
     center: float
@@ -51,6 +56,73 @@ def reverse_windowing(
     full_length: int,
     reduction: Callable = np.mean,
     fill_value: float = np.nan,
+) -> np.ndarray:
+    """
+    Reduces the window scores of every point over the windows covering it,
+    windows wrap around the end like `np.roll`. Sum and mean are computed
+    from cumulative sums in O(n), other reductions by the windows matrix.
+    Rows of a 2-D `data` are reversed independently.
+    """
+    data = np.asarray(data)
+    if reduction not in (np.sum, np.mean) or window_length > full_length:
+        return _reverse_windowing_rows(
+            data, window_length, full_length, reduction, fill_value
+        )
+
+    column = np.full(data.shape[:-1] + (full_length,), fill_value)
+    column[..., : data.shape[-1]] = data
+    if np.any(np.isinf(column)):
+        return _reverse_windowing_rows(
+            data, window_length, full_length, reduction, fill_value
+        )
+
+    # Point i is covered by the windows starting at i - w (mod full_length)
+    extended = np.concatenate(
+        (column[..., full_length - window_length + 1 :], column), axis=-1
+    )
+    missing = np.isnan(extended)
+    sums = np.zeros(extended.shape[:-1] + (extended.shape[-1] + 1,))
+    np.cumsum(np.where(missing, 0.0, extended), axis=-1, out=sums[..., 1:])
+    result = sums[..., window_length:] - sums[..., :full_length]
+
+    if missing.any():
+        # A NaN in the windows makes the reduction NaN, as np.sum and np.mean do
+        counts = np.zeros(sums.shape, dtype=np.int64)
+        np.cumsum(missing, axis=-1, out=counts[..., 1:])
+        result[counts[..., window_length:] - counts[..., :full_length] > 0] = np.nan
+    if reduction is np.mean:
+        return result / window_length
+    # Integer columns, e.g. anomaly counts with fill 0, keep their dtype
+    return result.astype(column.dtype, copy=False)
+
+
+def _reverse_windowing_rows(
+    data: np.ndarray,
+    window_length: int,
+    full_length: int,
+    reduction: Callable,
+    fill_value: float,
+) -> np.ndarray:
+    if data.ndim == 1:
+        return _reverse_windowing_matrix(
+            data, window_length, full_length, reduction, fill_value
+        )
+    return np.stack(
+        [
+            _reverse_windowing_matrix(
+                row, window_length, full_length, reduction, fill_value
+            )
+            for row in data
+        ]
+    )
+
+
+def _reverse_windowing_matrix(
+    data: np.ndarray,
+    window_length: int,
+    full_length: int,
+    reduction: Callable = np.mean,
+    fill_value: float = np.nan,
 ) -> np.ndarray:
     mapped = np.full(shape=(full_length, window_length), fill_value=fill_value)
     mapped[: len(data), 0] = data
@@ -61,12 +133,84 @@ def reverse_windowing(
     return reduction(mapped, axis=1)
 
 
+def mark_anomalous_windows(p: np.ndarray, z_eps) -> np.ndarray:
+    """
+    Marks the windows whose likelihood is below the quantile `z_eps`, along
+    the last axis. Likelihoods within rounding of it count as tied with it
+    and are not marked, e.g. a level with dims + 1 windows, whose windows
+    are all equally likely, so the marks do not depend on summation order.
+    """
+    tolerance = TIE_RTOL * np.max(np.abs(p), axis=-1, keepdims=True)
+    return p < z_eps - tolerance
+
+
 def combine_alternating(xs, ys):
     for x, y in zip(xs, ys):
         yield x
         yield y
 
 
+def cluster_1d(points: np.ndarray, eps: float, min_samples: int) -> np.ndarray:
+    """
+    DBSCAN of sorted 1-D points, the same labels as DBSCAN(eps, min_samples)
+    with -1 for noise, in O(k) passes instead of a neighbors tree. In 1-D the
+    clusters are the runs of core points split by gaps over `eps`, a border
+    point joins the cluster of its nearest core on the left if any is within
+    `eps` (DBSCAN expands it first), else the one on the right.
+    """
+    x = np.asarray(points, dtype=np.float64)
+    labels = np.full(len(x), -1)
+
+    neighbors = np.searchsorted(x, x + eps, side="right") - np.searchsorted(
+        x, x - eps, side="left"
+    )
+    cores = x[neighbors >= min_samples]
+    if len(cores) == 0:
+        return labels
+    core_labels = np.concatenate(([0], np.cumsum(np.diff(cores) > eps)))
+
+    left = np.searchsorted(cores, x, side="right") - 1
+    right = np.minimum(left + 1, len(cores) - 1)
+    near_left = (left >= 0) & (x - cores[np.maximum(left, 0)] <= eps)
+    near_right = (left + 1 < len(cores)) & (cores[right] - x <= eps)
+    labels = np.where(
+        near_left,
+        core_labels[np.maximum(left, 0)],
+        np.where(near_right, core_labels[right], -1),
+    )
+    return labels
+
+
+def find_cluster_anomalies(
+    point_anomaly_scores: np.ndarray,
+    d_max: float,
+    anomaly_counter_threshold: float,
+) -> list[AnomalyCluster]:
+    indices = np.arange(len(point_anomaly_scores))
+    anomalous_point_ids = indices[point_anomaly_scores != 0]
+
+    # clustering
+    labels = cluster_1d(anomalous_point_ids, eps=d_max, min_samples=5)
+
+    # collecting cluster anomalies
+    anomaly_clusters: list[AnomalyCluster] = []
+    classes = np.unique(labels)
+    for i in classes:
+        if i != -1:
+            cluster_points = indices[anomalous_point_ids[labels == i]]
+            cluster_center = int(
+                np.average(cluster_points, weights=point_anomaly_scores[cluster_points])
+            )
+            cluster_score = point_anomaly_scores[cluster_points].sum()
+            if cluster_score > anomaly_counter_threshold:
+                anomaly_clusters.append(
+                    AnomalyCluster(cluster_center, cluster_score, cluster_points)
+                )
+            else:
+                print(f"Cluster {i} with center {cluster_center} is not anomalous.")
+    return anomaly_clusters
+
+
 class DWT_MLEAD:
     def __init__(
         self,
@@ -143,11 +287,23 @@ class DWT_MLEAD:
         e_cov_est = EmpiricalCovariance(assume_centered=False)
         e_cov_est.fit(x_view)
 
-        # compute log likelihood for each window x in x_view
+        # log likelihood of every window x in x_view, the same as
+        # e_cov_est.score(x.reshape(1, -1)) without the per-window overhead
+        precision = e_cov_est.get_precision()
+        logdet = fast_logdet(precision)
+        dims = precision.shape[0]
+
         p = np.empty(shape=len(x_view))
-        for i, window in enumerate(x_view):
-            # p[i] = e_cov_est.score(window)
-            p[i] = e_cov_est.score(window.reshape(1, -1))
+        for start in range(0, len(x_view), LIKELIHOOD_CHUNK):
+            d = x_view[start : start + LIKELIHOOD_CHUNK] - e_cov_est.location_
+            # sum of (d d^T * precision), summed in the order of score()
+            quad = np.sum(
+                (d[:, :, None] * d[:, None, :] * precision).reshape(len(d), -1),
+                axis=1,
+            )
+            p[start : start + len(d)] = (
+                -quad + logdet - dims * np.log(2 * np.pi)
+            ) / 2.0
 
         # print(f"Gaussion Distribution for level {level}:")
         # print(
@@ -163,7 +319,7 @@ class DWT_MLEAD:
                 f"The quantile boundary type '{self.quantile_boundary_type}' is not implemented yet!"
             )
 
-        return p < z_eps
+        return mark_anomalous_windows(p, z_eps)
 
     def _push_anomaly_counts_down_to_points(
         self, coef_anomaly_counts: list[np.ndarray]
@@ -186,31 +342,9 @@ class DWT_MLEAD:
         d_max: float,
         anomaly_counter_threshold: float,
     ) -> list[AnomalyCluster]:
-        indices = np.arange(len(point_anomaly_scores))
-        anomalous_point_ids = indices[point_anomaly_scores != 0]
-
-        # clustering
-        dbs = DBSCAN(eps=d_max, min_samples=5).fit(anomalous_point_ids.reshape(-1, 1))
-
-        # collecting cluster anomalies
-        anomaly_clusters: list[AnomalyCluster] = []
-        classes = np.unique(dbs.labels_)
-        for i in classes:
-            if i != -1:
-                cluster_points = indices[anomalous_point_ids[dbs.labels_ == i]]
-                cluster_center = int(
-                    np.average(
-                        cluster_points, weights=point_anomaly_scores[cluster_points]
-                    )
-                )
-                cluster_score = point_anomaly_scores[cluster_points].sum()
-                if cluster_score > anomaly_counter_threshold:
-                    anomaly_clusters.append(
-                        AnomalyCluster(cluster_center, cluster_score, cluster_points)
-                    )
-                else:
-                    print(f"Cluster {i} with center {cluster_center} is not anomalous.")
-        return anomaly_clusters
+        return find_cluster_anomalies(
+            point_anomaly_scores, d_max, anomaly_counter_threshold
+        )
 
     def plot(
         self,
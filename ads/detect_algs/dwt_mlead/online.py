@@ -0,0 +1,276 @@
+import bisect
+import numpy as np
+
+from collections import deque
+
+from typing import Optional
+from sklearn.utils.extmath import fast_logdet
+from numpy.lib.stride_tricks import sliding_window_view
+
+SQRT2 = np.sqrt(2)
+# Windows of a coefficient stream fitted before its first scoring
+MIN_WINDOWS = 16
+# Newest window likelihoods the anomaly threshold of a stream is taken from
+QUANTILE_WINDOW = 4096
+
+
+class RunningGaussian:
+    def __init__(self, dims: int):
+        """
+        Mean and covariance of all windows added so far, merged block by
+        block with Welford's (Chan's) update, as EmpiricalCovariance fitted
+        on all of them.
+        """
+        self.dims = dims
+        self.count = 0
+        self.mean = np.zeros(dims)
+        self.comoment = np.zeros((dims, dims))
+
+    def add(self, windows: np.ndarray) -> None:
+        count = len(windows)
+        if count == 0:
+            return
+        mean = windows.mean(axis=0)
+        centered = windows - mean
+        delta = mean - self.mean
+        total = self.count + count
+        self.comoment += centered.T @ centered
+        self.comoment += np.outer(delta, delta) * (self.count * count / total)
+        self.mean += delta * (count / total)
+        self.count = total
+
+    def log_likelihoods(self, windows: np.ndarray) -> np.ndarray:
+        """Log likelihood of every window, as EmpiricalCovariance.score."""
+        precision = np.linalg.pinv(self.comoment / self.count, hermitian=True)
+        logdet = fast_logdet(precision)
+        d = windows - self.mean
+        quad = np.einsum("ij,jk,ik->i", d, precision, d)
+        return (-quad + logdet - self.dims * np.log(2 * np.pi)) / 2.0
+
+
+class SlidingQuantile:
+    def __init__(self, quantile: float, size: int):
+        """
+        Quantile of the newest `size` values, the same as np.percentile with
+        linear interpolation over them. The values are kept sorted, so an
+        insertion is a binary search and a bounded memmove.
+        """
+        self.quantile = quantile
+        self.size = size
+        self.__values: deque[float] = deque()
+        self.__sorted: list[float] = []
+
+    def __len__(self) -> int:
+        return len(self.__sorted)
+
+    def add(self, values: np.ndarray) -> None:
+        for value in values.tolist():
+            bisect.insort(self.__sorted, value)
+            self.__values.append(value)
+            if len(self.__values) > self.size:
+                oldest = self.__values.popleft()
+                del self.__sorted[bisect.bisect_left(self.__sorted, oldest)]
+
+    def value(self) -> float:
+        position = self.quantile * (len(self) - 1)
+        index = int(np.floor(position))
+        fraction = position - index
+        low = self.__sorted[index]
+        if fraction == 0:
+            return low
+        return low + (self.__sorted[index + 1] - low) * fraction
+
+
+class CoefficientStream:
+    def __init__(
+        self,
+        level: int,
+        window_size: int,
+        quantile_epsilon: float,
+        quantile_window: int,
+    ):
+        """
+        Detail or approximation coefficients of one level. Every new
+        coefficient completes one window, which is scored once against the
+        Gaussian of all windows so far and never again.
+        """
+        self.level = level
+        self.window_size = window_size
+        self.count = 0
+        self.gaussian = RunningGaussian(window_size)
+        self.threshold = SlidingQuantile(quantile_epsilon, quantile_window)
+        self.min_windows = max(MIN_WINDOWS, 2 * window_size)
+        # Anomalous windows covering each coefficient from `offset` on
+        self.offset = 0
+        self.counts = np.zeros(64, dtype=np.int64)
+        self.__tail = np.empty(0)
+        # Windows fitted but not scored yet, until there are min_windows
+        self.__waiting: list[np.ndarray] = []
+
+    def append(self, coefs: np.ndarray) -> np.ndarray:
+        """
+        Adds the new coefficients. Returns the first coefficient of every
+        window marked anomalous, their counts are not applied yet.
+        """
+        start = self.count - len(self.__tail)
+        values = np.concatenate((self.__tail, coefs))
+        self.count += len(coefs)
+        self.__tail = values[max(0, len(values) - self.window_size + 1) :]
+        if len(self.counts) < self.count - self.offset:
+            counts = np.zeros(2 * (self.count - self.offset), dtype=np.int64)
+            counts[: len(self.counts)] = self.counts
+            self.counts = counts
+        if len(values) < self.window_size:
+            return np.empty(0, dtype=np.int64)
+
+        windows = sliding_window_view(values, self.window_size)
+        self.gaussian.add(windows)
+        self.__waiting.append(windows)
+        if self.gaussian.count < self.min_windows:
+            return np.empty(0, dtype=np.int64)
+        windows = np.concatenate(self.__waiting)
+        start -= len(windows) - len(self.__waiting[-1])
+        self.__waiting = []
+
+        p = self.gaussian.log_likelihoods(windows)
+        self.threshold.add(p)
+        return start + np.flatnonzero(p < self.threshold.value())
+
+    def mark(self, starts: np.ndarray) -> None:
+        for start in starts:
+            stop = start + self.window_size - self.offset
+            if stop > 0:
+                self.counts[max(start - self.offset, 0) : stop] += 1
+
+    def forget(self, before: int) -> None:
+        """Drops the counts of the coefficients before `before`."""
+        drop = before - self.offset
+        # Compacted only once half of the buffer is stale, O(1) amortized
+        if drop > len(self.counts) // 2:
+            self.counts = self.counts[drop:].copy()
+            self.offset = before
+
+
+class OnlineDWT_MLEAD:
+    def __init__(
+        self,
+        start_level: int = 3,
+        max_level: int = 16,
+        quantile_epsilon: float = 0.01,
+        quantile_window: int = QUANTILE_WINDOW,
+    ):
+        """
+        Streaming DWT_MLEAD of one series. The Haar pyramid, the Gaussian
+        of every coefficient level and the quantile of its newest
+        `quantile_window` likelihoods are updated as points arrive, only the
+        windows completed by the new points are scored, so an update costs
+        O(new points * levels) and the memory is bounded.
+
+        The scores are not those of DWT_MLEAD.detect and depend on how the
+        series is split into updates: a window is scored once, against the
+        Gaussian and threshold of the windows up to its update, and keeps
+        that mark. The series is not padded to a power of two, a level gets
+        a coefficient for every complete block of 2^level points, and
+        `max_level` fixes the levels and window sizes as for a series of
+        2^max_level points. Only the points within the largest window (in
+        points) of the newest one keep their scores, see `first`.
+        """
+        self.start_level = start_level
+        self.max_level = max_level
+        self.quantile_epsilon = quantile_epsilon
+        self.n = 0
+
+        # skip the last level, as DWT_MLEAD does
+        self.__streams: dict[int, tuple[CoefficientStream, CoefficientStream]] = {
+            level: tuple(
+                CoefficientStream(
+                    level,
+                    max(2, max_level - level - start_level + 1),
+                    quantile_epsilon,
+                    quantile_window,
+                )
+                for _ in range(2)
+            )
+            for level in range(max(1, start_level), max_level)
+        }
+        # Points covered by the largest window, plus the incomplete block
+        self.horizon = max(
+            (streams[0].window_size + 1) << level
+            for level, streams in self.__streams.items()
+        )
+        # Approximation coefficient of every level waiting for its pair
+        self.__carry: list[np.ndarray] = [np.empty(0) for _ in range(max_level)]
+
+    def update(self, values: np.ndarray) -> np.ndarray:
+        """
+        Appends the new points of the series.
+        Returns the indices of the points that became anomalous.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        self.n += len(values)
+
+        marks = []
+        a = values
+        for level in range(1, self.max_level):
+            x = np.concatenate((self.__carry[level - 1], a))
+            pairs = len(x) // 2 * 2
+            self.__carry[level - 1] = x[pairs:]
+            if pairs == 0:
+                break
+            even, odd = x[0:pairs:2], x[1:pairs:2]
+            a = (even + odd) / SQRT2
+            d = (even - odd) / SQRT2
+            if level in self.__streams:
+                detail, approx = self.__streams[level]
+                marks.append((detail, detail.append(d)))
+                marks.append((approx, approx.append(a)))
+
+        first = self.first
+        touched = [
+            np.arange(
+                max(start << stream.level, first),
+                min((start + stream.window_size) << stream.level, self.n),
+            )
+            for stream, starts in marks
+            for start in starts
+        ]
+        points = np.unique(np.concatenate(touched or [np.empty(0, dtype=np.int64)]))
+
+        before = self._counts(points)
+        for stream, starts in marks:
+            stream.mark(starts)
+        after = self._counts(points)
+
+        for level, streams in self.__streams.items():
+            for stream in streams:
+                stream.forget(first >> level)
+        return points[(after >= 2) & (before < 2)]
+
+    @property
+    def first(self) -> int:
+        """The oldest point whose score is kept."""
+        return max(0, self.n - self.horizon)
+
+    def scores(
+        self, start: Optional[int] = None, stop: Optional[int] = None
+    ) -> np.ndarray:
+        """
+        Point anomaly scores of the points in [start, stop), by default
+        all points still kept (from `first` on).
+        """
+        start = self.first if start is None else start
+        if start < self.first:
+            raise ValueError(f"Scores of points before {self.first} are forgotten")
+        counter = self._counts(np.arange(start, self.n if stop is None else stop))
+        # delete event counters with count < 2
+        counter[counter < 2] = 0
+        return counter
+
+    def _counts(self, points: np.ndarray) -> np.ndarray:
+        counter = np.zeros(len(points))
+        for level, streams in self.__streams.items():
+            coefs = points >> level
+            for stream in streams:
+                valid = (coefs >= stream.offset) & (coefs < stream.count)
+                counter[valid] += stream.counts[coefs[valid] - stream.offset]
+        return counter
@@ -0,0 +1,149 @@
+import time
+import numpy as np
+
+from typing import Callable, Optional
+from dataclasses import dataclass
+
+from ads.detect_algs.triple_es.algorithm import (
+    CustomParameters,
+    fit_window,
+    triple_es_predict,
+)
+from ads.detect_algs.triple_es.batch import fit_holt_states
+
+# Weight of the newest observation in the expected cost of a forecaster
+COST_WEIGHT = 0.1
+# Newest intervals the interval forecasters look at
+INTERVALS = 50
+# Weight of the newest interval in the EWMA
+EWMA_WEIGHT = 0.3
+
+
+@dataclass
+class Forecaster:
+    """
+    Predicts the next timestamp of a source, `cost` is the expected
+    wall-clock time of one forecast in seconds, learned from the observed ones.
+    `window` returns the points of the source a forecast uses.
+    """
+
+    name: str
+    func: Callable[[np.ndarray, CustomParameters], float]
+    min_points: int
+    cost: float
+    window: Callable[[np.ndarray, CustomParameters], np.ndarray] = fit_window
+
+    def predict(
+        self, data: np.ndarray, config: CustomParameters = CustomParameters()
+    ) -> float:
+        start = time.perf_counter()
+        prediction = self.func(data, config)
+        self.observe(time.perf_counter() - start)
+        return prediction
+
+    def observe(self, seconds: float) -> None:
+        self.cost += COST_WEIGHT * (seconds - self.cost)
+
+
+# Registered forecasters in order of preference, from the cheapest to the one
+# used whenever the budget allows. The order is not by accuracy: on the CSV
+# datasets the interval forecasters often have a lower error than the fitted
+# models (see ads/benchmark.py).
+FORECASTERS: dict[str, Forecaster] = {}
+# Forecasters that fit a model, the rest are O(1) in the number of points
+FITTED_FORECASTERS = ("holt", "triple_es")
+
+
+def register_forecaster(
+    name: str,
+    min_points: int,
+    cost: float,
+    window: Callable[[np.ndarray, CustomParameters], np.ndarray] = fit_window,
+):
+    """
+    Registers the decorated func(data, config) as the preferred forecaster,
+    `window` returns the points it uses (the fitting window by default).
+    """
+
+    def decorator(func):
+        FORECASTERS[name] = Forecaster(name, func, min_points, cost, window)
+        return func
+
+    return decorator
+
+
+def interval_window(data: np.ndarray, config: CustomParameters) -> np.ndarray:
+    """The newest points the interval forecasters use."""
+    return data[-INTERVALS - 1 :]
+
+
+@register_forecaster("median_interval", min_points=2, cost=5e-5, window=interval_window)
+def median_interval(data: np.ndarray, config: CustomParameters) -> float:
+    intervals = np.diff(interval_window(data, config))
+    return float(data[-1] + np.median(intervals))
+
+
+@register_forecaster("ewma_interval", min_points=2, cost=5e-5, window=interval_window)
+def ewma_interval(data: np.ndarray, config: CustomParameters) -> float:
+    intervals = np.diff(interval_window(data, config))
+    weights = (1 - EWMA_WEIGHT) ** np.arange(len(intervals))[::-1]
+    return float(data[-1] + np.dot(weights, intervals) / weights.sum())
+
+
+@register_forecaster("holt", min_points=3, cost=3e-2)
+def holt(data: np.ndarray, config: CustomParameters) -> float:
+    """
+    Additive-trend smoothing fitted by the NumPy grid search. A single source
+    costs about as much as a TripleES fit (20-50 ms for 200-500 points), the
+    grid search pays off only for many sources at once.
+    """
+    return fit_holt_states([data], config)[0].forecast()
+
+
+@register_forecaster("triple_es", min_points=11, cost=3e-2)
+def triple_es(data: np.ndarray, config: CustomParameters) -> float:
+    return float(triple_es_predict(data, config))
+
+
+def choose_forecaster(
+    length: int,
+    budget: Optional[float] = None,
+    exclude: tuple[str, ...] = (),
+) -> Optional[Forecaster]:
+    """
+    Returns the most preferred forecaster usable for `length` points whose
+    expected cost fits the budget, or the cheapest usable one if none fits.
+    """
+    usable = [
+        forecaster
+        for name, forecaster in FORECASTERS.items()
+        if forecaster.min_points <= length and name not in exclude
+    ]
+    for forecaster in reversed(usable):
+        if budget is None or forecaster.cost <= budget:
+            return forecaster
+    return usable[0] if usable else None
+
+
+def forecast(
+    data: np.ndarray,
+    config: CustomParameters = CustomParameters(),
+    budget: Optional[float] = None,
+    exclude: tuple[str, ...] = (),
+) -> tuple[Optional[str], Optional[float]]:
+    """
+    Predicts with the preferred forecaster within the budget, a failed
+    forecaster falls back to the cheaper ones. Returns the name of the forecaster used
+    and the prediction, (None, None) if no forecaster succeeded.
+    """
+    forecaster = choose_forecaster(len(data), budget, exclude)
+    while forecaster is not None:
+        try:
+            prediction = forecaster.predict(data, config)
+            if np.isfinite(prediction):
+                return forecaster.name, prediction
+        except Exception:
+            pass
+        exclude = exclude + (forecaster.name,)
+        forecaster = choose_forecaster(len(data), forecaster.cost, exclude)
+    return None, None
@@ -1,9 +1,11 @@
 import numpy as np
 import pandas as pd
 
+from typing import Optional
 from dataclasses import dataclass
 from sklearn.preprocessing import MinMaxScaler
-from .model import TripleES
+from statsmodels.tsa.holtwinters import HoltWintersResults
+from .model import FitStart, TripleES
 
 
 @dataclass
@@ -12,6 +14,27 @@ class CustomParameters:
     trend: str = "add"
     seasonality: str = "add"
     random_state: int = 42
+    # Online mode: full refit after this many new points
+    refit_every: int = 50
+    # Online mode: full refit when the recent mean absolute error grows
+    # over this multiple of the in-sample one
+    drift_threshold: float = 3.0
+    # Fitting window: at most this many newest points (0 = no limit)
+    window_points: int = 500
+    # Fitting window: only points at most this many seconds older
+    # than the newest one (None = no limit)
+    window_horizon: Optional[float] = None
+    # Timestamps closer than this many seconds to the next one are merged
+    # into it, a dense burst counts as its last point (0 = no downsampling)
+    burst_interval: float = 0.0
+    # Expected arrivals forecast by one fit, used until an arrival misses
+    # its expected time by more than `path_tolerance` times the fit error
+    forecast_steps: int = 16
+    path_tolerance: float = 3.0
+    # Batch detection: points whose residual score is above this quantile
+    anomaly_quantile: float = 0.99
+    # Wall-clock seconds a fit may run before it is cancelled (None = no limit)
+    fit_timeout: Optional[float] = None
 
 
 def set_random_state(config: CustomParameters) -> None:
@@ -22,21 +45,49 @@ def set_random_state(config: CustomParameters) -> None:
     np.random.seed(seed)
 
 
-def triple_es_predict(
+def fit_window(
     data: np.ndarray,
     config: CustomParameters = CustomParameters(),
-) -> np.float64:
+) -> np.ndarray:
+    """
+    Returns the newest points the model is fitted on, limited by
+    `window_points` and `window_horizon` and with dense bursts downsampled,
+    but never fewer than the model needs (or all the data if shorter).
+    """
+    min_points = min(len(data), 10 + config.period)
+
+    window = data
+    if config.window_points > 0:
+        window = window[max(0, len(window) - max(config.window_points, min_points)) :]
+    if config.window_horizon is not None:
+        start = np.searchsorted(window, window[-1] - config.window_horizon)
+        window = window[min(start, len(window) - min_points) :]
+    if config.burst_interval > 0:
+        keep = np.empty(len(window), dtype=bool)
+        keep[-1] = True
+        np.greater_equal(np.diff(window), config.burst_interval, out=keep[:-1])
+        if np.count_nonzero(keep) >= min_points:
+            window = window[keep]
+    return window
+
+
+def triple_es_fit(
+    data: np.ndarray,
+    config: CustomParameters = CustomParameters(),
+    start: Optional[FitStart] = None,
+) -> tuple[TripleES, HoltWintersResults, np.float64]:
+    """
+    Fits TripleES on the last window of the data, warm started from
+    the previous fit of the source if given.
+    Returns the model, the fit results and the epoch the relative data starts from,
+    the model's `ts` is the effective window.
+    Raises FitTimeout if the fit runs over `config.fit_timeout`.
+    """
     set_random_state(config)
 
-    win = len(data)
-    if len(data) >= 1000 and len(data) < 10000:
-        win = 100
-    if len(data) >= 10000:
-        win = 1000
-
     # Change the data format from epoch to relative
     min_epoch = data[0]
-    relative_data = data[len(data) - win :] - min_epoch
+    relative_data = fit_window(data, config) - min_epoch
 
     triple_es: TripleES = TripleES(
         relative_data,
@@ -45,7 +96,16 @@ def triple_es_predict(
         config.seasonality,
         use_boxcox=False,
     )
-    model = triple_es.fit(relative_data)
+    model = triple_es.fit(relative_data, start, config.fit_timeout)
+    return triple_es, model, min_epoch
+
+
+def triple_es_predict(
+    data: np.ndarray,
+    config: CustomParameters = CustomParameters(),
+    start: Optional[FitStart] = None,
+) -> np.float64:
+    triple_es, model, min_epoch = triple_es_fit(data, config, start)
     prediction = triple_es.predict(model)
     return prediction + min_epoch
 
@@ -53,11 +113,20 @@ def triple_es_predict(
 def detect_anomalies(
     data: pd.DataFrame,
     config: CustomParameters = CustomParameters(),
-):
+) -> list[int]:
+    """
+    Returns the indices of the anomalous points of the whole series,
+    scored by the residuals of one TripleES fit, none if the series is
+    too short for the model or the fit failed.
+    """
+    if len(data) < 10 + config.period:
+        return []
     set_random_state(config)
 
     ts = (
-        MinMaxScaler(feature_range=(0.1, 1.1)).fit_transform(data).reshape(-1)
+        MinMaxScaler(feature_range=(0.1, 1.1))
+        .fit_transform(np.asarray(data, dtype=np.float64).reshape(-1, 1))
+        .reshape(-1)
     )  # data must be > 0
     triple_es: TripleES = TripleES(
         ts,
@@ -65,7 +134,7 @@ def detect_anomalies(
         config.trend,
         config.seasonality,
     )
-    res = triple_es.detect_anomalies()
+    res = triple_es.detect_anomalies(config.anomaly_quantile)
 
     # Check for NaN values
     nan_mask = np.isnan(res)
@@ -74,4 +143,4 @@ def detect_anomalies(
         # logger.debug("Could not detect anomalies with TripleES")
         return []
     else:
-        return res
+        return np.flatnonzero(res > 0).tolist()
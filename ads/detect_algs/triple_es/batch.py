@@ -0,0 +1,150 @@
+import numpy as np
+
+from typing import Optional
+
+from .algorithm import CustomParameters, fit_window
+from .online import HoltState
+
+# Points averaged for the initial trend, as the heuristic initialization
+INITIAL_TREND_POINTS = 10
+
+
+def pad_intervals(windows: list[np.ndarray]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Stacks the inter-arrival times of the timestamp windows into a matrix,
+    rows are padded at the end. Returns the matrix and the mask of its values.
+    """
+    width = max((len(window) - 1 for window in windows), default=0)
+    intervals = np.zeros((len(windows), max(width, 1)))
+    mask = np.zeros(intervals.shape, dtype=bool)
+    for i, window in enumerate(windows):
+        diffs = np.diff(window)
+        intervals[i, : len(diffs)] = diffs
+        mask[i, : len(diffs)] = True
+    return intervals, mask
+
+
+class BatchHoltWinters:
+    def __init__(
+        self,
+        alphas: np.ndarray = np.linspace(0.1, 1.0, 10),
+        beta_ratios: np.ndarray = np.array([0.0, 0.05, 0.2, 0.5, 1.0]),
+        refine: int = 3,
+    ):
+        """
+        Additive-trend exponential smoothing of many sources at once.
+        The timestamps of every row are the cumulative sum of its intervals,
+        alpha and beta (as a ratio of alpha, beta <= alpha) of every row are
+        searched on a grid evaluated for all rows together, then refined by
+        `refine` rounds of halved steps around the best point of each row.
+        """
+        self.alphas = alphas
+        self.beta_ratios = beta_ratios
+        self.refine = refine
+
+        self.alpha: Optional[np.ndarray] = None
+        self.beta: Optional[np.ndarray] = None
+        self.level: Optional[np.ndarray] = None
+        self.trend: Optional[np.ndarray] = None
+        self.mae: Optional[np.ndarray] = None
+        self.last: Optional[np.ndarray] = None
+
+    @staticmethod
+    def _smooth(
+        y: np.ndarray,
+        mask: np.ndarray,
+        trend0: np.ndarray,
+        alpha: np.ndarray,
+        beta: np.ndarray,
+    ) -> tuple[np.ndarray, ...]:
+        """
+        Runs the recursion for (candidates, rows) pairs of alpha and beta.
+        Returns the sum of squared and absolute errors, final level and trend.
+        """
+        level = np.zeros(alpha.shape)
+        trend = np.broadcast_to(trend0, alpha.shape).copy()
+        sse = np.zeros(alpha.shape)
+        sae = np.zeros(alpha.shape)
+        for t in range(1, y.shape[1]):
+            valid = mask[:, t - 1]
+            expected = level + trend
+            error = np.where(valid, y[:, t] - expected, 0.0)
+            # l' = l + b + alpha e, b' = beta (l' - l) + (1 - beta) b = b + alpha beta e
+            level = np.where(valid, expected + alpha * error, level)
+            trend = np.where(valid, trend + alpha * beta * error, trend)
+            sse += error * error
+            sae += np.abs(error)
+        return sse, sae, level, trend
+
+    def fit(self, intervals: np.ndarray, mask: np.ndarray) -> "BatchHoltWinters":
+        """
+        Fits every row of the padded inter-arrival matrix, `mask` marks
+        the values of each row, which start at its first column.
+        """
+        intervals = np.where(mask, intervals, 0.0)
+        count = mask.sum(axis=1)
+        y = np.zeros((len(intervals), intervals.shape[1] + 1))
+        np.cumsum(intervals, axis=1, out=y[:, 1:])
+
+        head = mask & (np.arange(mask.shape[1]) < INITIAL_TREND_POINTS)
+        trend0 = (intervals * head).sum(axis=1) / np.maximum(head.sum(axis=1), 1)
+
+        alpha, ratio = np.meshgrid(self.alphas, self.beta_ratios, indexing="ij")
+        alpha = np.repeat(alpha.reshape(-1, 1), len(y), axis=1)
+        ratio = np.repeat(ratio.reshape(-1, 1), len(y), axis=1)
+        best_alpha, best_ratio = self._select(y, mask, trend0, alpha, ratio)
+
+        alpha_step = np.diff(self.alphas).max(initial=0.1) / 2
+        ratio_step = np.diff(self.beta_ratios).max(initial=0.1) / 2
+        offsets = np.array([-1.0, 0.0, 1.0])
+        for _ in range(self.refine):
+            da, dr = np.meshgrid(offsets * alpha_step, offsets * ratio_step)
+            alpha = np.clip(best_alpha + da.reshape(-1, 1), 1e-4, 1.0)
+            ratio = np.clip(best_ratio + dr.reshape(-1, 1), 0.0, 1.0)
+            best_alpha, best_ratio = self._select(y, mask, trend0, alpha, ratio)
+            alpha_step /= 2
+            ratio_step /= 2
+
+        self.alpha = best_alpha
+        self.beta = best_alpha * best_ratio
+        _, sae, self.level, self.trend = self._smooth(
+            y, mask, trend0, self.alpha[None], self.beta[None]
+        )
+        self.level, self.trend = self.level[0], self.trend[0]
+        self.mae = sae[0] / np.maximum(count, 1)
+        self.last = y[np.arange(len(y)), count]
+        return self
+
+    def _select(self, y, mask, trend0, alpha, ratio) -> tuple[np.ndarray, np.ndarray]:
+        sse, _, _, _ = self._smooth(y, mask, trend0, alpha, alpha * ratio)
+        best = np.argmin(sse, axis=0)
+        rows = np.arange(len(y))
+        return alpha[best, rows], ratio[best, rows]
+
+    def forecast(self) -> np.ndarray:
+        """Returns the next inter-arrival time of every row."""
+        return self.level + self.trend - self.last
+
+
+def fit_holt_states(
+    sources: list[np.ndarray],
+    config: CustomParameters = CustomParameters(),
+) -> list[HoltState]:
+    """
+    Fits the last window of every source in one batch, the counterpart
+    of calling `fit_holt_state` on each of them.
+    """
+    windows = [fit_window(data, config) for data in sources]
+    model = BatchHoltWinters().fit(*pad_intervals(windows))
+    return [
+        HoltState(
+            alpha=float(model.alpha[i]),
+            beta=float(model.beta[i]),
+            level=float(window[0] + model.level[i]),
+            trend=float(model.trend[i]),
+            mae=float(model.mae[i]),
+            drift=float(model.mae[i]),
+            window=len(window),
+        )
+        for i, window in enumerate(windows)
+    ]
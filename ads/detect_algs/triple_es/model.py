@@ -1,14 +1,33 @@
+import time
 import warnings
 import numpy as np
 
+from typing import Optional
+from dataclasses import dataclass
 from statsmodels.tsa.holtwinters.model import ExponentialSmoothing, HoltWintersResults
 from statsmodels.tools.sm_exceptions import ConvergenceWarning
 
-
 warnings.simplefilter("ignore", ConvergenceWarning)
 warnings.simplefilter("ignore", RuntimeWarning)
 
 
+class FitTimeout(Exception):
+    """The fit was cancelled at its deadline."""
+
+
+@dataclass
+class FitStart:
+    """Smoothing parameters and trend of a previous fit, the start of the next one."""
+
+    alpha: float
+    beta: float
+    trend: float
+
+    def params(self, X: np.ndarray) -> list[float]:
+        """Start values of the optimizer: alpha, beta, initial level and trend."""
+        return [self.alpha, self.beta, float(X[0]) - self.trend, self.trend]
+
+
 class TripleES:
     def __init__(
         self,
@@ -27,14 +46,81 @@ class TripleES:
         self.seasonal_periods = period
         self.use_boxcox = use_boxcox
 
-    def fit(self, X) -> HoltWintersResults:
+    def fit(
+        self,
+        X,
+        start: Optional[FitStart] = None,
+        timeout: Optional[float] = None,
+    ) -> HoltWintersResults:
+        """
+        Fits the model, the optimizer starts from `start` if given
+        instead of a brute force search. A warm fit that does not
+        converge is repeated cold. A fit running over `timeout` seconds
+        is cancelled at the next optimizer iteration with FitTimeout.
+        The brute force search calls no callback and cannot be cancelled,
+        so a cold fit with a timeout starts from the heuristic values.
+        """
+        minimize_kwargs = None
+        if timeout is not None:
+            deadline = time.monotonic() + timeout
+
+            def check_deadline(*args):
+                if time.monotonic() > deadline:
+                    raise FitTimeout(f"Fit cancelled after {timeout} s")
+
+            minimize_kwargs = {"callback": check_deadline}
+
         model = ExponentialSmoothing(
             X,
             trend=self.trend,
             use_boxcox=self.use_boxcox,
             initialization_method="estimated",
         )
-        return model.fit()
+        if start is not None and self.trend == "add" and not self.use_boxcox:
+            try:
+                results = model.fit(
+                    start_params=start.params(X),
+                    use_brute=False,
+                    minimize_kwargs=minimize_kwargs,
+                )
+                if results.mle_retvals.success:
+                    return results
+            except ValueError:
+                pass
+        if timeout is not None:
+            check_deadline()
+        return model.fit(use_brute=timeout is None, minimize_kwargs=minimize_kwargs)
 
     def predict(self, model: HoltWintersResults, predict_points=1) -> np.float64:
         return model.forecast(predict_points)[0]
+
+    def detect_anomalies(self, quantile: float = 0.99) -> np.ndarray:
+        """
+        Scores the whole series with one fit: the in-sample residuals are
+        standardized by their median and MAD (robust to the anomalies
+        themselves). Returns the absolute scores of the points above the
+        `quantile` of all scores and 0 for the others, NaN if the fit failed.
+        A constant series has no anomalies (and no Box-Cox transform).
+        """
+        if np.ptp(self.ts) == 0:
+            return np.zeros(len(self.ts))
+        try:
+            model = self.fit(self.ts)
+        except (ValueError, np.linalg.LinAlgError):
+            return np.full(len(self.ts), np.nan)
+        residuals = np.asarray(self.ts, dtype=np.float64) - np.asarray(
+            model.fittedvalues, dtype=np.float64
+        )
+        if not np.all(np.isfinite(residuals)):
+            return np.full(len(residuals), np.nan)
+
+        center = np.median(residuals)
+        scale = 1.4826 * np.median(np.abs(residuals - center))
+        if scale <= 0:
+            scale = np.std(residuals)
+        if scale <= 0:
+            return np.zeros(len(residuals))
+
+        scores = np.abs(residuals - center) / scale
+        threshold = np.quantile(scores, quantile)
+        return np.where(scores > threshold, scores, 0.0)
@@ -0,0 +1,177 @@
+import numpy as np
+
+from typing import Optional
+from dataclasses import dataclass
+
+from .algorithm import CustomParameters, triple_es_fit
+from .model import FitStart
+
+# Weight of the newest absolute error in the running drift estimate
+DRIFT_WEIGHT = 0.1
+
+
+@dataclass
+class HoltState:
+    """
+    Fitted state of the additive-trend exponential smoothing of one source,
+    level and trend are in epoch seconds.
+    """
+
+    alpha: float
+    beta: float
+    level: float
+    trend: float
+    mae: float  # in-sample mean absolute error of the fit
+    drift: float  # running mean absolute error since the fit
+    age: int = 0  # points applied since the fit
+    window: int = 0  # number of points the fit was made on
+
+    def forecast(self) -> float:
+        return self.level + self.trend
+
+    def forecast_path(self, steps: int) -> np.ndarray:
+        """Returns the next `steps` expected timestamps."""
+        return self.level + self.trend * np.arange(1, steps + 1)
+
+    def error_scale(self) -> float:
+        # Errors below 1% of the interval are noise of a regular source
+        return max(self.mae, 0.01 * abs(self.trend), 1e-9)
+
+    def update(self, values: np.ndarray) -> None:
+        """Applies the Holt-Winters recursion for every new timestamp, O(1) each."""
+        for y in values:
+            expected = self.level + self.trend
+            error = abs(y - expected)
+            level = self.alpha * y + (1 - self.alpha) * expected
+            self.trend = self.beta * (level - self.level) + (1 - self.beta) * self.trend
+            self.level = level
+            self.drift = (1 - DRIFT_WEIGHT) * self.drift + DRIFT_WEIGHT * error
+            self.age += 1
+
+    def fit_start(self) -> FitStart:
+        """Start values of the next full fit of the source."""
+        return FitStart(alpha=self.alpha, beta=self.beta, trend=self.trend)
+
+    def needs_refit(self, config: CustomParameters) -> bool:
+        if self.age >= config.refit_every:
+            return True
+        return self.drift > config.drift_threshold * self.error_scale()
+
+    def path(self, config: CustomParameters, total: int) -> "ForecastPath":
+        """Returns the forecast path of the state made with `total` timestamps."""
+        return ForecastPath(
+            times=self.forecast_path(config.forecast_steps),
+            tolerance=config.path_tolerance * self.error_scale(),
+            total=total,
+        )
+
+
+@dataclass
+class ForecastPath:
+    """
+    Next expected timestamps of a source from one fit, they serve as
+    the forecasts while the new timestamps arrive on time.
+    """
+
+    times: np.ndarray
+    tolerance: float  # seconds an arrival may miss its expected time
+    total: int  # timestamps of the source when the path was made
+
+    def follow(self, data: np.ndarray, total: int) -> Optional[float]:
+        """
+        Checks the timestamps appended since the path was made against it.
+        Returns the next expected timestamp, or None if an arrival is out of
+        tolerance or the path ran out. Late arrivals within tolerance can
+        overtake the path, a next time not after the last timestamp counts
+        as running out.
+        """
+        new = total - self.total
+        if new < 0 or new > len(data) or new >= len(self.times):
+            return None
+        if new:
+            errors = np.abs(data[len(data) - new :] - self.times[:new])
+            if np.any(errors > self.tolerance):
+                return None
+        if len(data) and self.times[new] <= data[-1]:
+            return None
+        return float(self.times[new])
+
+
+def fit_holt_state(
+    data: np.ndarray,
+    config: CustomParameters = CustomParameters(),
+    start: Optional[FitStart] = None,
+) -> HoltState:
+    """
+    Fits TripleES on the data and returns its final state.
+    Its forecast is the same as `triple_es_predict(data, config, start)`.
+    """
+    triple_es, model, min_epoch = triple_es_fit(data, config, start)
+    mae = float(np.mean(np.abs(model.resid)))
+    return HoltState(
+        alpha=float(model.params["smoothing_level"]),
+        beta=float(model.params["smoothing_trend"]),
+        level=float(model.level[-1] + min_epoch),
+        trend=float(model.trend[-1]),
+        mae=mae,
+        drift=mae,
+        window=len(triple_es.ts),
+    )
+
+
+class OnlineTripleES:
+    def __init__(self, config: CustomParameters = CustomParameters()):
+        """
+        Holt-Winters states of the sources. New timestamps update the state
+        of their source in O(1), a full refit is needed only every
+        `refit_every` points or when the errors drift.
+        """
+        self.config = config
+        self.__states: dict[str, HoltState] = {}
+        self.__totals: dict[str, int] = {}
+
+    def advance(self, name: str, data: np.ndarray, total: int) -> Optional[float]:
+        """
+        Applies the timestamps appended since the last call to the state.
+        `total` is the number of timestamps ever appended to the source.
+        Returns the forecast, or None if the source needs a full refit.
+        """
+        state = self.__states.get(name)
+        if state is None:
+            return None
+
+        new = total - self.__totals[name]
+        if new < 0 or new > len(data):
+            # The source was reloaded or the new points are not retained
+            self.forget(name)
+            return None
+
+        if new:
+            state.update(data[len(data) - new :])
+            self.__totals[name] = total
+        if state.needs_refit(self.config):
+            return None
+        return state.forecast()
+
+    def state(self, name: str) -> Optional[HoltState]:
+        return self.__states.get(name)
+
+    def latest(self, name: str) -> Optional[float]:
+        """Returns the forecast of the last state even if it needs a refit."""
+        state = self.__states.get(name)
+        return None if state is None else state.forecast()
+
+    def store(self, name: str, state: HoltState, total: int) -> None:
+        """Saves the state of a full fit, made with `total` timestamps."""
+        self.__states[name] = state
+        self.__totals[name] = total
+
+    def states(self) -> dict[str, tuple[HoltState, int]]:
+        """Returns the states with the number of timestamps applied to them."""
+        return {
+            name: (state, self.__totals[name]) for name, state in self.__states.items()
+        }
+
+    def forget(self, name: str) -> None:
+        self.__states.pop(name, None)
+        self.__totals.pop(name, None)
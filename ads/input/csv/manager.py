@@ -60,6 +60,15 @@ class CSVManager(InputManager):
 
         self.logs = data_dict
 
+    def next_arrival(self, source: str) -> float:
+        """
+        Returns the next timestamp of the source that is not in self.logs yet
+        """
+        ind = list(self.logs.keys()).index(source)
+        if self.current_indices[ind] < len(self.data[ind]):
+            return self.data[ind][self.current_indices[ind]]
+        return float("inf")
+
     def update(self, first: bool = False) -> bool:
         """
         Updates self.logs with the next closest timestamps randomly and returns True if more data exists.
@@ -67,15 +76,14 @@ class CSVManager(InputManager):
         if first:
             sleep(60 * 2)  # Имитация задержки
 
-        if self.logs is None:
+        if not self.logs:
             return False  # Если fetch_logs еще не вызван
 
-        data_dict = self.logs.copy()  # Копируем текущие логи
         current_time = time()
         has_more_data = False  # Флаг, есть ли еще данные
 
         # Проходим по каждому массиву
-        for ind, key in enumerate(data_dict.keys()):
+        for ind, key in enumerate(self.logs.keys()):
             array = self.data[ind]
             # Проверяем, есть ли еще данные в массиве
             if self.current_indices[ind] < len(array):
@@ -84,10 +92,11 @@ class CSVManager(InputManager):
                 closest_idx = np.searchsorted(array, current_time, side="right") - 1
                 if closest_idx < 0:
                     closest_idx = 0
-                # Если новый индекс больше текущего, обновляем
+                # Если новый индекс больше текущего, дописываем новые timestamps
                 if closest_idx >= self.current_indices[ind]:
-                    data_dict[key] = array[: closest_idx + 1]
+                    self.logs.extend(
+                        key, array[self.current_indices[ind] : closest_idx + 1]
+                    )
                     self.current_indices[ind] = closest_idx + 1
 
-        self.logs = data_dict
         return has_more_data
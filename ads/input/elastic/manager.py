@@ -1,3 +1,6 @@
+import numpy as np
+import pandas as pd
+
 from datetime import datetime, timedelta
 
 from .core import ElasticCore
@@ -5,6 +8,15 @@ from .queries import ElasticQueries
 from ads.input.interface import InputManager
 
 
+def to_epoch(timestamps: list[str]) -> np.ndarray:
+    """
+    Converts @timestamp values to a sorted array of epoch seconds.
+    """
+    datetimes = pd.to_datetime(timestamps, utc=True)
+    epoch = (datetimes - pd.Timestamp(0, tz="UTC")) / pd.Timedelta(seconds=1)
+    return np.sort(np.asarray(epoch, dtype=np.float64))
+
+
 class ElasticManager(InputManager):
     def __init__(self) -> None:
         """
@@ -24,6 +36,21 @@ class ElasticManager(InputManager):
         Returns all the logs from logs-* index.
         """
         self.__elastic_queries.filters = filters
-        self.__logs = self.__elastic_queries.get_logs_from_interval(
-            self.start, self.end
-        )
+        logs = self.__elastic_queries.get_logs_from_interval(self.start, self.end)
+        self.logs = {name: to_epoch(values) for name, values in logs.items()}
+
+    def update(self) -> bool:
+        """
+        Appends the logs that arrived since the last query.
+        """
+        start, self.end = self.end, datetime.now().isoformat()
+        logs = self.__elastic_queries.get_logs_from_interval(start, self.end)
+
+        for name, values in logs.items():
+            timestamps = to_epoch(values)
+            if name in self.logs and len(self.logs[name]):
+                # The interval bounds are inclusive, skip already stored logs
+                timestamps = timestamps[timestamps > self.logs[name][-1]]
+            self.logs.extend(name, timestamps)
+
+        return True
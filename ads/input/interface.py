@@ -1,19 +1,22 @@
 from abc import ABC, abstractmethod
+from typing import Mapping, Optional
+
+from ads.input.store import Retention, TimestampStore
 
 
 class InputManager(ABC):
     """Abstract base class for input managers."""
 
-    def __init__(self):
-        self.__logs: dict[str, list[int]]
+    def __init__(self, retention: Optional[Retention] = None):
+        self.__logs = TimestampStore(retention)
 
     @property
-    def logs(self) -> dict[str, list[int]]:
+    def logs(self) -> TimestampStore:
         return self.__logs
 
     @logs.setter
-    def logs(self, logs: dict[str, list[int]]) -> None:
-        self.__logs = logs
+    def logs(self, logs: Mapping[str, list[float]]) -> None:
+        self.__logs.load(logs)
 
     @abstractmethod
     def fetch_logs(self, **kwargs):
@@ -21,16 +24,24 @@ class InputManager(ABC):
 
         Args:
             **kwargs: Keyword arguments specific to the data source.
-        Saves the logs in the `self.__logs` attribute.
+        Saves the logs in the `self.logs` store.
         """
         pass
 
+    def next_arrival(self, source: str) -> Optional[float]:
+        """Epoch time when new data of the source is expected.
+
+        Returns None if unknown (the source is polled) or `inf` if the
+        source will not receive any more data.
+        """
+        return None
+
     @abstractmethod
     def update(self, **kwargs):
         """Update the logs with new data.
 
         Args:
             **kwargs: Keyword arguments specific to the data source.
-        Updates the `self.__logs` attribute with new data.
+        Appends new data to the `self.logs` store.
         """
         pass
@@ -3,7 +3,7 @@ from pathlib import Path
 
 from ads.input.interface import InputManager
 from .generate import generate_csv
-from .update_generators import update_logs, time, np
+from .update_generators import update_logs, next_timestamp, time, np
 
 
 class SimulationManager(InputManager):
@@ -34,6 +34,12 @@ class SimulationManager(InputManager):
 
         self.logs = data_dict
 
+    def next_arrival(self, source: str) -> float:
+        """
+        Returns the earliest time when the source can get a new timestamp
+        """
+        return next_timestamp(self.logs, source)
+
     def update(self) -> bool:
         """
         Updates the logs
@@ -41,6 +47,6 @@ class SimulationManager(InputManager):
         if self.logs["sped_up"][-1] > time.time():
             return False
 
-        self.logs = update_logs(self.logs)
+        update_logs(self.logs)
 
         return True
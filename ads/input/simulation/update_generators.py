@@ -2,82 +2,103 @@ import numpy as np
 import time
 import random
 
+from ads.input.store import TimestampStore
 
-def update_logs(logs: dict) -> dict:
+
+# Shortest possible interval between two new timestamps of each source
+MIN_INTERVALS = {
+    "regular": 10,
+    "random_daily": 86400 - 3600,
+    "trace": 1,
+    "sped_up": 3,
+    "slow_down": 20,
+}
+
+
+def next_timestamp(logs: TimestampStore, source: str) -> float:
     """
-    Updates the logs with the next closest timestamps randomly
+    Returns the earliest time when the source can get a new timestamp
     """
-    res = [
-        len(logs["regular"]),
-        len(logs["random_daily"]),
-        len(logs["trace"]),
-        len(logs["sped_up"]),
-        len(logs["slow_down"]),
-    ]
+    if source not in MIN_INTERVALS:
+        return float("inf")  # Source is not updated
+    return logs[source][-1] + MIN_INTERVALS[source]
+
+
+def update_logs(logs: TimestampStore) -> TimestampStore:
+    """
+    Updates the logs with the next closest timestamps randomly,
+    sleeps until the earliest next timestamp instead of spinning
+    """
+    generators = {
+        "regular": lambda last: update_timestamps_regular(last, 10),
+        "random_daily": lambda last: update_timestamps_random_daily(
+            last, 86400, 3600 * 2
+        ),
+        "trace": update_timestamps_trace,
+        "sped_up": lambda last: update_timestamps_regular(last, 3),
+        "slow_down": lambda last: update_timestamps_regular(last, 20),
+    }
     while True:
-        logs["regular"] = update_timestamps_regular(logs["regular"], 10)
-        logs["random_daily"] = update_timestamps_random_daily(
-            logs["random_daily"], 86400, 3600 * 2
-        )
-        logs["trace"] = update_timestamps_trace(logs["trace"])
-        logs["sped_up"] = update_timestamps_regular(logs["sped_up"], 3)
-        logs["slow_down"] = update_timestamps_regular(logs["slow_down"], 20)
-
-        if res != [
-            len(logs["regular"]),
-            len(logs["random_daily"]),
-            len(logs["trace"]),
-            len(logs["sped_up"]),
-            len(logs["slow_down"]),
-        ]:
+        appended = 0
+        for name, generate in generators.items():
+            appended += logs.extend(name, generate(logs[name][-1]))
+
+        if appended:
             break
+        # Sources already past their earliest time are due at a random one
+        now = time.time()
+        upcoming = [next_timestamp(logs, name) for name in generators]
+        time.sleep(min((t for t in upcoming if t > now), default=now + 1) - now)
 
     return logs
 
 
 def update_timestamps_regular(
-    timestamps: np.ndarray, frequency_seconds: int
+    last_timestamp: float, frequency_seconds: int
 ) -> np.ndarray:
     """
-    Updates the timestamps with a regular frequency
+    Returns the new timestamps with a regular frequency
     """
-    timestamp = timestamps[-1] + frequency_seconds
+    timestamps = []
+    timestamp = last_timestamp + frequency_seconds
     while timestamp <= time.time():
-        timestamps = np.append(timestamps, timestamp)
+        timestamps.append(timestamp)
         timestamp += frequency_seconds
 
-    return timestamps
+    return np.array(timestamps)
 
 
 def update_timestamps_random_daily(
-    timestamps: np.ndarray, frequency_seconds: int, random_range_seconds: int
+    last_timestamp: float, frequency_seconds: int, random_range_seconds: int
 ) -> np.ndarray:
     """
-    Updates the timestamps with a random daily frequency
+    Returns the new timestamps with a random daily frequency
     """
-    timestamp = timestamps[-1] + frequency_seconds
+    timestamps = []
+    timestamp = last_timestamp + frequency_seconds
     while timestamp <= time.time():
         n_timestamp = timestamp + random.randint(
             -random_range_seconds // 2, random_range_seconds // 2
         )
         if n_timestamp > time.time():
             break
-        timestamps = np.append(timestamps, n_timestamp)
+        timestamps.append(n_timestamp)
         timestamp += frequency_seconds
 
-    return timestamps
+    return np.array(timestamps)
 
 
-def update_timestamps_trace(timestamps: np.ndarray) -> np.ndarray:
+def update_timestamps_trace(last_timestamp: float) -> np.ndarray:
     """
-    Updates the timestamps with a trace frequency
+    Returns the new timestamps with a trace frequency
     """
-    timestamp = timestamps[-1]
+    timestamps = []
+    timestamp = last_timestamp
     while True:
         repeat = random.choice([True, False])
         if not repeat:
             timestamp += 1
         if timestamp > time.time():
             break
-        timestamps = np.append(timestamps, timestamp)
-    return timestamps
+        timestamps.append(timestamp)
+    return np.array(timestamps)
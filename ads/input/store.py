@@ -0,0 +1,202 @@
+import os
+import numpy as np
+
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, Mapping, Optional
+
+
+def _env_number(name: str, default=None, cast=float):
+    """Reads a positive number from env, empty or 0 means no limit."""
+    value = os.getenv(name, default)
+    if value is None or value == "" or float(value) <= 0:
+        return None
+    return cast(value)
+
+
+@dataclass
+class Retention:
+    """
+    Retention policy of a source buffer.
+    max_points - keep at most this many newest timestamps (None = unlimited)
+    max_age - keep only timestamps not older than `newest - max_age` seconds
+    capacity - initial preallocated size of the buffer
+    """
+
+    max_points: Optional[int] = field(
+        default_factory=lambda: _env_number("ADS_RETENTION_POINTS", "10000", int)
+    )
+    max_age: Optional[float] = field(
+        default_factory=lambda: _env_number("ADS_RETENTION_AGE")
+    )
+    capacity: int = 1024
+
+
+class TimestampBuffer:
+    """
+    Append-only ring buffer of float64 timestamps for one source.
+
+    Every value is written twice, at `i` and `i + capacity`, so the retained
+    window `[start, start + size)` is always contiguous and can be returned
+    as a view without copying. Views stay valid until the next write.
+    """
+
+    def __init__(self, retention: Retention):
+        self.retention = retention
+        capacity = retention.capacity
+        if retention.max_points is not None:
+            capacity = min(capacity, retention.max_points)
+        self._capacity = max(1, capacity)
+        self._data = np.empty(2 * self._capacity, dtype=np.float64)
+        self._start = 0
+        self._size = 0
+        self.total = 0  # Number of timestamps ever appended
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    def view(self, last: Optional[int] = None) -> np.ndarray:
+        """
+        Returns a read-only view of the retained timestamps,
+        or of the `last` newest ones.
+        """
+        start = self._start
+        if last is not None and last < self._size:
+            start += self._size - last
+        window = self._data[start : self._start + self._size]
+        window.flags.writeable = False
+        return window
+
+    def clear(self) -> None:
+        self._start = 0
+        self._size = 0
+        self.total = 0
+
+    def extend(self, values) -> int:
+        """
+        Appends new timestamps and applies the retention policy.
+        Returns the number of appended timestamps.
+        """
+        values = np.asarray(values, dtype=np.float64).reshape(-1)
+        k = len(values)
+        if k == 0:
+            return 0
+        self.total += k
+
+        self._reserve(self._size + k)
+        capacity = self._capacity
+        if k >= capacity:
+            values = values[-capacity:]
+            k = capacity
+            self._start = 0
+            self._size = 0
+        elif self._size + k > capacity:
+            # Drop the oldest timestamps, they are overwritten below
+            dropped = self._size + k - capacity
+            self._start = (self._start + dropped) % capacity
+            self._size -= dropped
+
+        pos = (self._start + self._size) % capacity
+        first = min(k, capacity - pos)
+        self._data[pos : pos + first] = values[:first]
+        self._data[capacity + pos : capacity + pos + first] = values[:first]
+        rest = k - first
+        if rest:
+            self._data[:rest] = values[first:]
+            self._data[capacity : capacity + rest] = values[first:]
+        self._size += k
+
+        if self.retention.max_age is not None:
+            cutoff = values[-1] - self.retention.max_age
+            expired = int(np.searchsorted(self.view(), cutoff, side="left"))
+            self._start = (self._start + expired) % capacity
+            self._size -= expired
+
+        return k
+
+    def _reserve(self, required: int) -> None:
+        """
+        Grows the buffer (doubling) until it fits `required` values
+        or reaches `max_points`.
+        """
+        limit = self.retention.max_points
+        if required <= self._capacity or (
+            limit is not None and self._capacity >= limit
+        ):
+            return
+
+        capacity = self._capacity
+        while capacity < required:
+            capacity *= 2
+        if limit is not None:
+            capacity = min(capacity, limit)
+
+        window = self.view()
+        data = np.empty(2 * capacity, dtype=np.float64)
+        data[: len(window)] = window
+        data[capacity : capacity + len(window)] = window
+        self._data = data
+        self._capacity = capacity
+        self._start = 0
+
+
+class TimestampStore(Mapping[str, np.ndarray]):
+    """
+    Per-source timestamp store behind `InputManager.logs`.
+    Behaves like a read-only `dict[str, np.ndarray]` of zero-copy views.
+    """
+
+    def __init__(self, retention: Optional[Retention] = None):
+        self.retention = retention or Retention()
+        self._buffers: dict[str, TimestampBuffer] = {}
+        self._listeners: list[Callable[[str], None]] = []
+
+    def __getitem__(self, source: str) -> np.ndarray:
+        return self._buffers[source].view()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._buffers)
+
+    def __len__(self) -> int:
+        return len(self._buffers)
+
+    def buffer(self, source: str) -> TimestampBuffer:
+        """Returns the buffer of the source, creating it if needed."""
+        if source not in self._buffers:
+            self._buffers[source] = TimestampBuffer(self.retention)
+        return self._buffers[source]
+
+    def window(self, source: str, last: Optional[int] = None) -> np.ndarray:
+        """Returns a view of the `last` newest timestamps of the source."""
+        return self._buffers[source].view(last)
+
+    def total(self, source: str) -> int:
+        """Returns the number of timestamps ever appended to the source."""
+        return self._buffers[source].total
+
+    def add_listener(self, listener: Callable[[str], None]) -> None:
+        """Calls `listener(source)` whenever new timestamps are appended."""
+        self._listeners.append(listener)
+
+    def extend(self, source: str, values) -> int:
+        """Appends new timestamps to the source."""
+        appended = self.buffer(source).extend(values)
+        if appended:
+            for listener in self._listeners:
+                listener(source)
+        return appended
+
+    def replace(self, source: str, values) -> None:
+        """Replaces all timestamps of the source."""
+        buffer = self.buffer(source)
+        buffer.clear()
+        buffer.extend(values)
+
+    def load(self, logs: Mapping) -> None:
+        """Replaces the whole store content with `logs`."""
+        self._buffers.clear()
+        for source, values in logs.items():
+            self.replace(source, values)
@@ -0,0 +1,81 @@
+"""
+Compact binary serializer of Celery messages, a copy of this module is
+in ads/core/serializer.py, both must stay the same.
+
+Messages are msgpack, NumPy arrays of timestamps are msgpack extensions:
+- packed little-endian float64 values
+- the first value as float64 followed by int32 differences, used when all
+  timestamps are whole seconds (typical for epoch timestamps of logs)
+The decoder returns NumPy arrays without a Python object per element.
+"""
+
+import struct
+import msgpack
+import numpy as np
+
+from kombu.serialization import register
+
+SERIALIZER_NAME = "ads-msgpack"
+CONTENT_TYPE = "application/x-ads-msgpack"
+
+FLOAT64_ARRAY = 1
+DELTA_INT32_ARRAY = 2
+
+_INT32_MAX = np.iinfo(np.int32).max
+
+
+def pack_array(array: np.ndarray) -> msgpack.ExtType:
+    array = np.ascontiguousarray(array, dtype="<f8").reshape(-1)
+    if len(array) > 1 and np.all(np.isfinite(array)):
+        deltas = np.diff(array)
+        if (
+            np.all(array == np.floor(array))
+            and np.max(np.abs(deltas)) <= _INT32_MAX
+            and np.max(np.abs(array)) < 2**53
+        ):
+            return msgpack.ExtType(
+                DELTA_INT32_ARRAY,
+                struct.pack("<d", array[0]) + deltas.astype("<i4").tobytes(),
+            )
+    return msgpack.ExtType(FLOAT64_ARRAY, array.tobytes())
+
+
+def unpack_array(code: int, data: bytes):
+    if code == FLOAT64_ARRAY:
+        return np.frombuffer(data, dtype="<f8")
+    if code == DELTA_INT32_ARRAY:
+        (first,) = struct.unpack_from("<d", data)
+        deltas = np.frombuffer(data, dtype="<i4", offset=8)
+        array = np.empty(len(deltas) + 1, dtype=np.float64)
+        array[0] = first
+        np.cumsum(deltas, dtype=np.float64, out=array[1:])
+        array[1:] += first
+        return array
+    return msgpack.ExtType(code, data)
+
+
+def _default(obj):
+    if isinstance(obj, np.ndarray):
+        return pack_array(obj)
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Cannot serialize {type(obj).__name__}")
+
+
+def dumps(obj) -> bytes:
+    return msgpack.packb(obj, default=_default, use_bin_type=True)
+
+
+def loads(data: bytes):
+    return msgpack.unpackb(data, ext_hook=unpack_array, raw=False, strict_map_key=False)
+
+
+def register_serializer() -> None:
+    """Registers the serializer in kombu under SERIALIZER_NAME."""
+    register(
+        SERIALIZER_NAME,
+        dumps,
+        loads,
+        content_type=CONTENT_TYPE,
+        content_encoding="binary",
+    )
@@ -6,12 +6,18 @@ from celery import Celery
 from redis import Redis
 
 from logger.conf import init_logger, log_predictions, log_basic, send_to_endpoint
+from serializer import SERIALIZER_NAME, register_serializer
 
 # Create a Celery instance
 app = Celery("tasks")
 app.conf.broker_url = os.getenv("CELERY_BROKER_URL")
 app.conf.result_backend = os.getenv("CELERY_RESULT_BACKEND")
 
+register_serializer()
+app.conf.task_serializer = SERIALIZER_NAME
+app.conf.accept_content = [SERIALIZER_NAME, "json"]
+app.conf.result_accept_content = [SERIALIZER_NAME, "json"]
+
 r = Redis(host="redis", port=6379, db=0)
 init_logger()
 
@@ -41,12 +47,18 @@ class LogAnalyzer:
         return [predicted_interval - min_error, predicted_interval + max_error + 1]
 
     def process_new_logs(self, timestamps: list, prediction: float):
-        """Processes a list of new logs and updates the state"""
+        """
+        Processes a list of new logs and updates the state.
+        `timestamps` is either the whole history of the source or only
+        the timestamps sent since the last dispatch (delta payloads),
+        as a list (json) or a NumPy array (ads-msgpack).
+        """
+        timestamps = np.asarray(timestamps, dtype=np.float64)
 
         state = r.hgetall(self.redis_key)
         if not state:
             # First run
-            last_timestamp = timestamps[-1]
+            last_timestamp = float(timestamps[-1])
             prediction_range = self.get_prediction_range(prediction, last_timestamp)
 
         else:
@@ -57,7 +69,11 @@ class LogAnalyzer:
                 log_basic(f"No new logs for {self.source_name}")
                 return float("inf")
 
-            first_new_timestamp = [ts for ts in timestamps if ts > last_timestamp][0]
+            new_timestamps = timestamps[timestamps > last_timestamp]
+            if len(new_timestamps) == 0:
+                log_basic(f"No new logs for {self.source_name}")
+                return float("inf")
+            first_new_timestamp = float(new_timestamps[0])
             interval = first_new_timestamp - last_timestamp
 
             send_to_endpoint(
@@ -119,7 +135,7 @@ class LogAnalyzer:
         r.hset(
             self.redis_key,
             mapping={
-                "last_timestamp": timestamps[-1],
+                "last_timestamp": float(timestamps[-1]),
                 "last_prediction": prediction,
             },
         )
@@ -159,10 +175,14 @@ def process_logs(source_name: str, timestamps: list, prediction: float):
     Processes a list of new logs.
     Args:
         source_name (str): The name of the logs source.
-        timestamps (list): The list of new timestamps.
+        timestamps (list | np.ndarray): The new timestamps.
         prediction (float): Predicted next timestamp.
         timeout_factor (float): Factor for timeout.
     """
+    if len(timestamps) == 0:
+        return
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+
     analyzer = LogAnalyzer(source_name)
     timeout = analyzer.process_new_logs(timestamps, prediction)
 
@@ -187,3 +207,18 @@ def process_logs(source_name: str, timestamps: list, prediction: float):
     check_timestamp.apply_async(
         (source_name, timestamps[-1]), eta=datetime.fromtimestamp(max_range_ts)
     )
+
+
+@app.task
+def process_logs_batch(batch: list):
+    """
+    Processes new logs of several sources in one message.
+    Args:
+        batch (list): (source_name, timestamps, prediction) of each source,
+            with the same meaning as the `process_logs` arguments.
+    """
+    for source_name, timestamps, prediction in batch:
+        try:
+            process_logs(source_name, timestamps, prediction)
+        except Exception as e:
+            log_basic(f"Processing of {source_name} failed: {e}", level="ERROR")
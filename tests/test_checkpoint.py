@@ -0,0 +1,30 @@
+import numpy as np
+
+from ads.core.checkpoint import decode, encode
+from ads.input.store import TimestampStore
+from ads.detect_algs.triple_es.model import FitStart
+from ads.detect_algs.triple_es.online import HoltState
+
+
+def test_round_trip_with_duplicate_timestamps():
+    logs = TimestampStore()
+    logs.extend("source", [10.0, 20.0, 20.0, 20.0, 30.0, 40.0])
+    state = HoltState(
+        alpha=0.5, beta=0.1, level=20.0, trend=10.0, mae=1.0, drift=1.0, window=3
+    )
+    start = FitStart(alpha=0.5, beta=0.1, trend=10.0)
+
+    models, dispatched = decode(
+        encode({"source": (state, 3, start)}, {"source": 2}, logs), logs
+    )
+    assert dispatched == {"source": 2}
+    assert models == {"source": (state, 3, start)}
+
+
+def test_marks_follow_a_reloaded_history():
+    logs = TimestampStore()
+    logs.extend("source", [10.0, 20.0, 20.0, 30.0])
+    data = encode({}, {"source": 2}, logs)
+
+    logs.replace("source", [0.0, 10.0, 20.0, 20.0, 30.0, 40.0])
+    assert decode(data, logs)[1] == {"source": 3}
@@ -0,0 +1,17 @@
+import numpy as np
+
+from ads.detect_algs.dwt_mlead.algorithm import main, main_batch
+
+
+def test_batch_matches_single_series():
+    # Levels with dims + 1 windows have tied likelihoods, which used to be
+    # marked by rounding differently in the batch
+    rng = np.random.default_rng(1)
+    series = []
+    for _ in range(4):
+        series.append(rng.normal(size=1024))
+        series.append(np.cumsum(rng.normal(size=1024)))
+        series.append(rng.integers(0, 3, 1024).astype(np.float64))
+        series.append(np.round(np.sin(np.arange(1024) / 7) * 3))
+    series.append(rng.normal(size=600))
+    assert main_batch(series) == [main(x) for x in series]
@@ -0,0 +1,30 @@
+import numpy as np
+
+from ads.core.forecast import ForecastPool
+from ads.core.settings import CoreSettings
+from ads.detect_algs.triple_es.online import ForecastPath
+
+
+def test_path_overtaken_by_arrivals():
+    path = ForecastPath(times=np.array([10.0, 11.0, 12.0]), tolerance=5.0, total=5)
+    data = np.array([0.0, 2.0, 4.0, 6.0, 8.0, 10.0, 13.0])
+    assert path.follow(data, 7) is None
+    assert path.follow(data[:-1], 6) == 11.0
+
+
+def test_predictions_after_last_timestamp():
+    rng = np.random.default_rng(0)
+    intervals = rng.exponential(10, 400)
+    timestamps = 1_700_000_000 + np.cumsum(intervals)
+    pool = ForecastPool(
+        CoreSettings(forecast_workers=0, forecast_steps=16, online_forecast=True)
+    )
+
+    predictions = 0
+    for total in range(60, len(timestamps) + 1):
+        data = timestamps[:total]
+        forecast = pool.predict_all({"source": data}, {"source": total})
+        if "source" in forecast:
+            predictions += 1
+            assert forecast["source"] > data[-1]
+    assert predictions > 0
@@ -0,0 +1,21 @@
+import numpy as np
+
+from ads.detect_algs.triple_es.algorithm import detect_anomalies
+from ads.detect_algs.triple_es.model import TripleES
+
+
+def test_constant_series_has_no_anomalies():
+    scores = TripleES(np.ones(50), 1, "add", "add").detect_anomalies()
+    assert np.array_equal(scores, np.zeros(50))
+    assert detect_anomalies(np.full(50, 60.0)) == []
+
+
+def test_short_series_has_no_anomalies():
+    assert detect_anomalies(np.arange(5, dtype=np.float64)) == []
+
+
+def test_spike_is_anomalous():
+    rng = np.random.default_rng(0)
+    intervals = 60 + rng.normal(0, 1, 200)
+    intervals[150] = 600
+    assert 150 in detect_anomalies(intervals)